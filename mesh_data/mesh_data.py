@@ -0,0 +1,109 @@
+# mesh_data/mesh_data.py
+# 多个工具共用的网格数据读取与表面对应关系
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from mathutils.bvhtree import BVHTree
+
+# 表面对应关系缓存：(源/目标指纹) -> 最近三角形顶点索引与重心坐标
+CORRESPONDENCE_CACHE = OrderedDict()
+CORRESPONDENCE_CACHE_SIZE = 8
+
+def read_co(data, count):
+    """用 foreach_get 一次读取顶点/形态键坐标，返回 (count, 3) 数组"""
+    co = np.empty(count * 3, dtype=np.float32)
+    data.foreach_get("co", co)
+    return co.reshape(count, 3)
+
+def read_attr(collection, attr, dtype, width=1):
+    values = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attr, values)
+    return values
+
+def read_edge_creases(mesh):
+    attr = mesh.attributes.get("crease_edge")
+    if attr is not None:
+        return read_attr(attr.data, "value", np.float32)
+    try:
+        return read_attr(mesh.edges, "crease", np.float32)
+    except AttributeError:
+        return np.zeros(0, dtype=np.float32)
+
+def mesh_topology_hash(mesh):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.int64(len(mesh.vertices)).tobytes())
+    h.update(read_attr(mesh.polygons, "loop_total", np.int32).tobytes())
+    h.update(read_attr(mesh.loops, "vertex_index", np.int32).tobytes())
+    h.update(read_attr(mesh.edges, "vertices", np.int32, 2).tobytes())
+    h.update(read_edge_creases(mesh).tobytes())
+    return h.hexdigest()
+
+def basis_co(obj):
+    mesh = obj.data
+    if mesh.shape_keys:
+        return read_co(mesh.shape_keys.key_blocks[0].data, len(mesh.vertices))
+    return read_co(mesh.vertices, len(mesh.vertices))
+
+def barycentric_weights(points, a, b, c):
+    v0, v1, v2 = b - a, c - a, points - a
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+    denom = d00 * d11 - d01 * d01
+    degenerate = np.abs(denom) < 1e-20
+    denom[degenerate] = 1.0
+    v = (d11 * d20 - d01 * d21) / denom
+    w = (d00 * d21 - d01 * d20) / denom
+    bary = np.clip(np.stack((1.0 - v - w, v, w), axis=1), 0.0, None)
+    bary[degenerate] = (1.0, 0.0, 0.0)
+    return bary / bary.sum(axis=1, keepdims=True)
+
+def build_surface_correspondence(source_co, source_tris, points):
+    """
+    对每个查询点求源网格表面上的最近点，返回 (三角形顶点索引 (N, 3), 重心坐标 (N, 3), 距离 (N,))。
+    之后任何逐顶点数据都可以用三个非零项的稀疏插值从源网格传到查询点。
+    """
+    bvh = BVHTree.FromPolygons(source_co.tolist(), source_tris.tolist())
+    tri_index = np.zeros(len(points), dtype=np.int64)
+    nearest = np.zeros((len(points), 3), dtype=np.float64)
+    distance = np.full(len(points), np.inf)
+    for i, point in enumerate(points.tolist()):
+        location, normal, index, dist = bvh.find_nearest(point)
+        if index is not None:
+            tri_index[i] = index
+            nearest[i] = location
+            distance[i] = dist
+    tris = source_tris[tri_index]
+    co = source_co.astype(np.float64)
+    bary = barycentric_weights(nearest, co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]])
+    return tris, bary, distance
+
+def mesh_triangles(mesh):
+    mesh.calc_loop_triangles()
+    return read_attr(mesh.loop_triangles, "vertices", np.int32, 3).reshape(-1, 3)
+
+def object_correspondence(source, target):
+    """目标网格顶点（变换到源物体空间）到源网格表面的对应关系，按几何与变换指纹缓存"""
+    source_co = basis_co(source)
+    target_co = basis_co(target)
+    to_source = np.array(source.matrix_world.inverted() @ target.matrix_world)
+    cache_key = hashlib.blake2b(b"".join((
+        mesh_topology_hash(source.data).encode(), source_co.tobytes(),
+        mesh_topology_hash(target.data).encode(), target_co.tobytes(), to_source.tobytes()
+    )), digest_size=16).digest()
+    if cache_key in CORRESPONDENCE_CACHE:
+        CORRESPONDENCE_CACHE.move_to_end(cache_key)
+        return CORRESPONDENCE_CACHE[cache_key]
+    points = target_co @ to_source[:3, :3].T + to_source[:3, 3]
+    correspondence = build_surface_correspondence(source_co, mesh_triangles(source.data), points)
+    CORRESPONDENCE_CACHE[cache_key] = correspondence
+    while len(CORRESPONDENCE_CACHE) > CORRESPONDENCE_CACHE_SIZE:
+        CORRESPONDENCE_CACHE.popitem(last=False)
+    return correspondence
+
+def interpolate(correspondence, values):
+    """按对应关系把源网格逐顶点数据 (V_src, N) 插值到目标顶点"""
+    tris, bary, distance = correspondence
+    return np.einsum('ij,ijk->ik', bary, values[tris])
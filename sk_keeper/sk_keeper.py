@@ -12,8 +12,36 @@ bl_info = {
 import time
 import bpy
 import re
+import os
+import json
+import hashlib
+import numpy as np
+from collections import OrderedDict
 from bpy.types import Operator, PropertyGroup
-from bpy.props import BoolProperty, CollectionProperty
+from bpy.props import BoolProperty, CollectionProperty, EnumProperty
+from ..vertex_group_data.vertex_group_data import read_vertex_weights, group_weights, csr_rows, read_name_list
+from ..mesh_data.mesh_data import read_co, read_attr, mesh_topology_hash, object_correspondence, interpolate
+
+# 细分线性算子缓存：(拓扑哈希, 细分设置) -> CSR 稀疏矩阵
+SUBD_OPERATOR_CACHE = {}
+# 控制顶点着色缓存：拓扑哈希 -> 颜色数组，决定是否值得推导时复用
+SUBD_COLOR_CACHE = {}
+SUBD_CACHE_SIZE = 4
+SUBD_GRAPH_CHUNK = 8192
+SUBD_CHUNK_FLOATS = 32 * 1024 * 1024
+SUBD_WEIGHT_EPSILON = 1e-7
+SUBD_TOLERANCE = 1e-4
+ARMATURE_TOLERANCE = 1e-4
+
+# 形态键应用结果缓存：(修改器栈指纹, 形态键坐标哈希) -> 求值结果。
+# 只保存在内存中，不写入 .blend，按 LRU 淘汰。
+APPLY_CACHE = OrderedDict()
+APPLY_CACHE_MAX_BYTES = 512 * 1024 * 1024
+apply_cache_bytes = 0
+
+UNCACHEABLE_MODIFIERS = {'NODES', 'PARTICLE_SYSTEM', 'DYNAMIC_PAINT', 'CLOTH', 'SOFT_BODY', 'FLUID', 'COLLISION', 'OCEAN', 'EXPLODE'}
+MODIFIER_UI_PROPS = {'rna_type', 'name', 'show_viewport', 'show_render', 'show_in_editmode', 'show_on_cage',
+                     'show_expanded', 'is_active', 'is_override_data', 'use_pin_to_last', 'persistent_uid', 'execution_time'}
 
 def log(msg):
     t = time.localtime()
@@ -78,19 +106,720 @@ def add_objs_shapekeys(destination, sources):
     bpy.context.view_layer.objects.active = destination
     bpy.ops.object.join_shapes()
 
-def has_vertex_displacement(obj, shape_key, base_verts, epsilon=1e-6):
-    """检查形态键是否包含顶点位移"""
-    shape_verts = shape_key.data
-    for i in range(len(base_verts)):
-        if (abs(shape_verts[i].co.x - base_verts[i].co.x) > epsilon or
-            abs(shape_verts[i].co.y - base_verts[i].co.y) > epsilon or
-            abs(shape_verts[i].co.z - base_verts[i].co.z) > epsilon):
-            return True
-    return False
+def find_empty_shape_keys(key_blocks, epsilon=1e-6):
+    """向量化比较每个形态键与其参照形态键（relative_key），返回无位移形态键名称"""
+    count = len(key_blocks[0].data)
+    coords = {}
+    def co(kb):
+        if kb.name not in coords:
+            coords[kb.name] = read_co(kb.data, count)
+        return coords[kb.name]
+    empty = []
+    for kb in key_blocks[1:]:
+        if kb.relative_key == kb or not np.any(np.abs(co(kb) - co(kb.relative_key)) > epsilon):
+            empty.append(kb.name)
+    return empty
+
+def find_duplicate_shape_keys(key_blocks, epsilon=1e-5, n_projections=8):
+    """
+    按位移（相对各自 relative_key）查找完全相同和误差 epsilon 内的重复形态键，返回分组名称列表。
+    量化位移哈希相同的形态键直接归为一组；其余代表项用随机投影签名做候选过滤：
+    |(a-b)·r| <= max|a-b| * ||r||_1，签名差超出该界的两键必不重复，只有候选对才逐顶点精确比较。
+    """
+    count = len(key_blocks[0].data)
+    coords = {}
+    def co(kb):
+        if kb.name not in coords:
+            coords[kb.name] = read_co(kb.data, count)
+        return coords[kb.name]
+    keys = list(key_blocks[1:])
+    deltas = [co(kb) - co(kb.relative_key) for kb in keys]
+    parent = list(range(len(keys)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+    buckets = {}
+    for i, delta in enumerate(deltas):
+        digest = hashlib.blake2b(np.rint(delta / epsilon).astype(np.int64).tobytes(), digest_size=16).digest()
+        if digest in buckets:
+            union(buckets[digest], i)
+        else:
+            buckets[digest] = i
+    representatives = np.array(sorted(buckets.values()), dtype=np.int64)
+    if len(representatives) > 1:
+        rng = np.random.default_rng(0)
+        projection = rng.standard_normal((count * 3, n_projections))
+        bounds = epsilon * np.abs(projection).sum(axis=0) * 1.001 + 1e-9
+        signatures = np.array([deltas[i].astype(np.float64).ravel() @ projection for i in representatives])
+        order = np.argsort(signatures[:, 0])
+        signatures = signatures[order]
+        representatives = representatives[order]
+        for a in range(len(representatives)):
+            b = a + 1
+            while b < len(representatives) and signatures[b, 0] - signatures[a, 0] <= bounds[0]:
+                i, j = representatives[a], representatives[b]
+                if (np.all(np.abs(signatures[b] - signatures[a]) <= bounds)
+                        and find(i) != find(j)
+                        and np.abs(deltas[i] - deltas[j]).max() <= epsilon):
+                    union(i, j)
+                b += 1
+    groups = {}
+    for i in range(len(keys)):
+        groups.setdefault(find(i), []).append(keys[i].name)
+    return [names for root, names in sorted(groups.items()) if len(names) > 1]
+
+def prune_delta_noise(key_blocks, threshold, apply=True):
+    """
+    把每个形态键中相对 relative_key 位移长度小于 threshold 的顶点归零。
+    参照键先于依赖它的形态键处理，保留的位移叠加在处理后的参照键上。
+    返回每个形态键的统计：受影响顶点数、顶点索引范围和包围盒。
+    """
+    count = len(key_blocks[0].data)
+    original = {kb.name: read_co(kb.data, count) for kb in key_blocks}
+    result = {key_blocks[0].name: original[key_blocks[0].name]}
+    stats = []
+    def process(kb, visiting):
+        if kb.name in result:
+            return result[kb.name]
+        relative = kb.relative_key
+        if relative == kb or relative.name in visiting:
+            parent = original[relative.name]
+        else:
+            parent = process(relative, visiting | {kb.name})
+        delta = original[kb.name] - original[relative.name]
+        moved = np.einsum('ij,ij->i', delta, delta) > threshold * threshold
+        new = parent + np.where(moved[:, None], delta, 0.0).astype(np.float32)
+        result[kb.name] = new
+        indices = np.flatnonzero(moved)
+        entry = {"name": kb.name, "moved": len(indices), "index_range": None, "bbox": None}
+        if len(indices):
+            entry["index_range"] = (int(indices[0]), int(indices[-1]))
+            entry["bbox"] = (new[indices].min(axis=0), new[indices].max(axis=0))
+        stats.append(entry)
+        if apply and not np.array_equal(new, original[kb.name]):
+            write_co(kb.data, new)
+        return new
+    for kb in key_blocks[1:]:
+        process(kb, frozenset())
+    order = {kb.name: i for i, kb in enumerate(key_blocks)}
+    return sorted(stats, key=lambda entry: order[entry["name"]])
+
+def mask_weights(obj, group_name, csr=None):
+    """读取顶点组作为遮罩，group_name 为空时返回 None"""
+    if not group_name:
+        return None
+    vg = obj.vertex_groups.get(group_name)
+    if vg is None:
+        raise ValueError(f"顶点组 {group_name} 不存在")
+    return group_weights(csr if csr is not None else read_vertex_weights(obj), vg.index)
+
+def mix_shape_keys(obj, weighted_names, mask=None):
+    """按权重混合多个形态键的位移（相对各自 relative_key），叠加到参照键上，可选顶点遮罩"""
+    key_blocks = obj.data.shape_keys.key_blocks
+    count = len(key_blocks[0].data)
+    delta = np.zeros((count, 3), dtype=np.float32)
+    for name, weight in weighted_names:
+        kb = key_blocks[name]
+        delta += weight * (read_co(kb.data, count) - read_co(kb.relative_key.data, count))
+    if mask is not None:
+        delta *= mask[:, None]
+    return read_co(key_blocks[0].data, count) + delta
+
+def split_shape_keys(obj, names, left_mask, right_mask, suffixes=("_L", "_R")):
+    """把每个形态键按左右遮罩拆分为两个新形态键，返回新形态键名称"""
+    key_blocks = obj.data.shape_keys.key_blocks
+    count = len(key_blocks[0].data)
+    created = []
+    for name in names:
+        kb = key_blocks[name]
+        relative = read_co(kb.relative_key.data, count)
+        delta = read_co(kb.data, count) - relative
+        for mask, suffix in zip((left_mask, right_mask), suffixes):
+            new_kb = obj.shape_key_add(name=name + suffix, from_mix=False)
+            write_co(new_kb.data, relative + delta * mask[:, None])
+            new_kb.relative_key = key_blocks[kb.relative_key.name]
+            new_kb.slider_min = kb.slider_min
+            new_kb.slider_max = kb.slider_max
+            created.append(new_kb.name)
+    return created
+
+def transfer_shape_keys(source, target, max_distance=0.0):
+    """把源物体的全部形态键位移通过表面对应关系传递到不同拓扑的目标物体"""
+    correspondence = object_correspondence(source, target)
+    source_blocks = source.data.shape_keys.key_blocks
+    source_count = len(source.data.vertices)
+    linear = np.array(target.matrix_world.inverted() @ source.matrix_world)[:3, :3]
+    if not target.data.shape_keys:
+        target.shape_key_add(name="Basis", from_mix=False)
+    target_blocks = target.data.shape_keys.key_blocks
+    target_base = read_co(target_blocks[0].data, len(target.data.vertices))
+    outside = correspondence[2] > max_distance if max_distance > 0 else None
+    transferred = []
+    for kb in source_blocks[1:]:
+        delta = read_co(kb.data, source_count) - read_co(kb.relative_key.data, source_count)
+        moved = interpolate(correspondence, delta) @ linear.T
+        if outside is not None:
+            moved[outside] = 0.0
+        target_kb = target_blocks.get(kb.name)
+        if target_kb is None or target_kb == target_blocks[0]:
+            target_kb = target.shape_key_add(name=kb.name, from_mix=False)
+        write_co(target_kb.data, target_base + moved)
+        target_kb.slider_min = -10.0
+        target_kb.slider_max = kb.slider_max
+        target_kb.slider_min = kb.slider_min
+        transferred.append(target_kb.name)
+    return transferred
+
+def export_sparse_shape_keys(obj, directory, threshold=1e-6):
+    """
+    把全部形态键相对参照键的位移导出为紧凑的稀疏缓冲：
+    ShapeKeyOffset.buf     uint32 × (K + 1)，每个形态键在下面两个缓冲中的起始行，最后一项为总行数
+    ShapeKeyVertexId.buf   uint32 × N，移动顶点的索引
+    ShapeKeyVertexOffset.buf float32 × 3N，对应顶点的位移
+    另写出 ShapeKeys.json 记录形态键名称与行范围。文件大小只与移动顶点数有关。
+    """
+    key_blocks = obj.data.shape_keys.key_blocks
+    count = len(key_blocks[0].data)
+    base = read_co(key_blocks[0].data, count)
+    prefix = os.path.join(directory, obj.name)
+    offsets = [0]
+    manifest = []
+    with open(prefix + "-ShapeKeyVertexId.buf", "wb") as ids_file, open(prefix + "-ShapeKeyVertexOffset.buf", "wb") as offsets_file:
+        for kb in key_blocks[1:]:
+            delta = read_co(kb.data, count) - base
+            rows = np.flatnonzero(np.abs(delta).max(axis=1) > threshold)
+            rows.astype(np.uint32).tofile(ids_file)
+            delta[rows].astype(np.float32).tofile(offsets_file)
+            manifest.append({"name": kb.name, "start": offsets[-1], "count": len(rows)})
+            offsets.append(offsets[-1] + len(rows))
+    np.array(offsets, dtype=np.uint32).tofile(prefix + "-ShapeKeyOffset.buf")
+    with open(prefix + "-ShapeKeys.json", "w", encoding="utf-8") as file:
+        json.dump({"object": obj.name, "vertex_count": count, "threshold": threshold, "shape_keys": manifest}, file, ensure_ascii=False, indent=2)
+    return offsets[-1]
+
+def remove_shape_keys(obj, names, replacements=None):
+    """
+    一次遍历删除指定形态键（参照键除外）。
+    以被删除形态键为参照的形态键改为指向 replacements 中给出的替代键（须与被删除键绝对坐标相同，
+    如参照键相同的重复组代表项），没有替代键时指向其最近的未删除上级参照键。
+    """
+    key_blocks = obj.data.shape_keys.key_blocks
+    names = set(names) - {key_blocks[0].name}
+    replacements = replacements or {}
+    for kb in key_blocks:
+        replacement = key_blocks.get(replacements.get(kb.relative_key.name, ""))
+        if replacement is not None and replacement.name not in names and replacement != kb:
+            kb.relative_key = replacement
+            continue
+        relative = kb.relative_key
+        visited = set()
+        while relative.name in names and relative.name not in visited:
+            visited.add(relative.name)
+            relative = relative.relative_key
+        if relative.name in names:
+            relative = key_blocks[0]
+        if relative != kb.relative_key:
+            kb.relative_key = relative
+    removed = []
+    for kb in reversed(key_blocks[1:]):
+        if kb.name in names:
+            removed.append(kb.name)
+            obj.shape_key_remove(kb)
+    obj.active_shape_key_index = min(obj.active_shape_key_index, len(key_blocks) - 1)
+    return removed[::-1]
+
+def reorder_shape_keys(obj, order):
+    """
+    按名称列表一次性重建形态键顺序：参照键保持首位，order 中的形态键依次排在其后，
+    其余形态键保持原有相对顺序。只重建第一个位置发生变化之后的形态键，返回重建数量。
+    """
+    key_blocks = obj.data.shape_keys.key_blocks
+    current = [kb.name for kb in key_blocks]
+    target = [current[0]]
+    for name in order:
+        if name in key_blocks and name not in target:
+            target.append(name)
+    placed = set(target)
+    target += [name for name in current if name not in placed]
+    first = next((i for i, (a, b) in enumerate(zip(current, target)) if a != b), None)
+    if first is None:
+        return 0
+    count = len(key_blocks[0].data)
+    settings = capture_shapekey_settings(key_blocks)
+    coords = {name: read_co(key_blocks[name].data, count) for name in current[first:]}
+    active_name = obj.active_shape_key.name if obj.active_shape_key else current[0]
+    for kb in reversed(key_blocks[first:]):
+        obj.shape_key_remove(kb)
+    for name in target[first:]:
+        kb = obj.shape_key_add(name=name, from_mix=False)
+        write_co(kb.data, coords[name])
+    restore_shapekey_settings(key_blocks, settings)
+    obj.active_shape_key_index = key_blocks.find(active_name)
+    return len(target) - first
+
+def prune_shape_keys(obj, remove_empty=False, name_pattern=None, epsilon=1e-6):
+    """批量删除无位移和/或名称匹配 name_pattern 的形态键，返回被删除的名称"""
+    key_blocks = obj.data.shape_keys.key_blocks
+    names = set()
+    if name_pattern:
+        pattern = re.compile(name_pattern)
+        names.update(kb.name for kb in key_blocks[1:] if pattern.match(kb.name))
+    if remove_empty:
+        names.update(find_empty_shape_keys(key_blocks, epsilon))
+    removed = remove_shape_keys(obj, names)
+    for name in removed:
+        log(f"删除形态键: {name}")
+    return removed
+
+def write_co(data, co):
+    data.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+
+def capture_shapekey_settings(key_blocks):
+    return [{
+        "name": kb.name,
+        "value": kb.value,
+        "slider_min": kb.slider_min,
+        "slider_max": kb.slider_max,
+        "mute": kb.mute,
+        "interpolation": kb.interpolation,
+        "vertex_group": kb.vertex_group,
+        "relative_key": kb.relative_key.name,
+    } for kb in key_blocks]
+
+def restore_shapekey_settings(key_blocks, settings):
+    for s in settings:
+        kb = key_blocks.get(s["name"])
+        if kb is None:
+            continue
+        # 先放宽下限，避免 slider_min/slider_max 相互钳制
+        kb.slider_min = -10.0
+        kb.slider_max = s["slider_max"]
+        kb.slider_min = s["slider_min"]
+        kb.value = s["value"]
+        kb.mute = s["mute"]
+        kb.interpolation = s["interpolation"]
+        kb.vertex_group = s["vertex_group"]
+        relative_key = key_blocks.get(s["relative_key"])
+        if relative_key is not None:
+            kb.relative_key = relative_key
+
+def replace_object(obj, receiver):
+    """用 receiver 替换原对象，保留原对象与网格的名称"""
+    orig_name = obj.name
+    orig_data = obj.data
+    orig_mesh_name = orig_data.name
+    bpy.data.objects.remove(obj)
+    if orig_data.users == 0:
+        bpy.data.meshes.remove(orig_data)
+    receiver.name = orig_name
+    receiver.data.name = orig_mesh_name
+
+def evaluate_pinned(obj, depsgraph):
+    """对当前固定的形态键求值，返回修改器作用后的顶点坐标"""
+    obj.update_tag()
+    depsgraph.update()
+    obj_eval = obj.evaluated_get(depsgraph)
+    eval_mesh = obj_eval.to_mesh()
+    try:
+        return read_co(eval_mesh.vertices, len(eval_mesh.vertices))
+    finally:
+        obj_eval.to_mesh_clear()
+
+def csr_from_pairs(rows, cols, n_rows, n_cols):
+    keys = np.unique(rows.astype(np.int64) * n_cols + cols)
+    rows = keys // n_cols
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_rows))))
+    return indptr, (keys % n_cols).astype(np.int32)
+
+def csr_gather(indptr, indices, rows):
+    """取出若干行的全部列索引，返回 (所在行序号, 列索引)"""
+    counts = indptr[rows + 1] - indptr[rows]
+    offsets = np.repeat(indptr[rows] - np.cumsum(counts) + counts, counts)
+    return np.repeat(np.arange(len(rows)), counts), indices[offsets + np.arange(offsets.size)]
+
+def sparse_apply(indptr, cols, vals, co):
+    """CSR 稀疏矩阵与坐标矩阵 (V, N) 相乘"""
+    nonempty = indptr[:-1] < indptr[1:]
+    out = np.zeros((len(indptr) - 1, co.shape[1]), dtype=np.float64)
+    out[nonempty] = np.add.reduceat(vals[:, None] * co[cols], indptr[:-1][nonempty], axis=0)
+    return out
+
+def subsurf_conflict_graph(mesh):
+    """
+    细分后每个顶点只依赖其所在面周围一圈面的控制顶点，
+    因此面邻接距离不超过 3 的两个控制顶点可能影响同一输出顶点。
+    """
+    n_verts = len(mesh.vertices)
+    loop_total = read_attr(mesh.polygons, "loop_total", np.int64)
+    loop_vertex = read_attr(mesh.loops, "vertex_index", np.int64)
+    loop_start = np.concatenate(([0], np.cumsum(loop_total)[:-1])).astype(np.int64)
+    rows = [np.arange(n_verts)]
+    cols = [np.arange(n_verts)]
+    for n in np.unique(loop_total):
+        starts = loop_start[loop_total == n]
+        verts = loop_vertex[starts[:, None] + np.arange(n)]
+        rows.append(np.repeat(verts, n, axis=1).ravel())
+        cols.append(np.tile(verts, (1, n)).ravel())
+    adj_indptr, adj_indices = csr_from_pairs(np.concatenate(rows), np.concatenate(cols), n_verts, n_verts)
+    indptr, indices = adj_indptr, adj_indices
+    for _ in range(2):
+        new_rows, new_cols = [], []
+        for start in range(0, n_verts, SUBD_GRAPH_CHUNK):
+            block = np.arange(start, min(start + SUBD_GRAPH_CHUNK, n_verts))
+            row_pos, mid = csr_gather(indptr, indices, block)
+            mid_pos, far = csr_gather(adj_indptr, adj_indices, mid)
+            block_indptr, block_indices = csr_from_pairs(row_pos[mid_pos], far, len(block), n_verts)
+            new_rows.append(np.repeat(block, np.diff(block_indptr)))
+            new_cols.append(block_indices)
+        indptr, indices = csr_from_pairs(np.concatenate(new_rows), np.concatenate(new_cols), n_verts, n_verts)
+    return indptr, indices
+
+def greedy_coloring(indptr, indices):
+    ptr = indptr.tolist()
+    idx = indices.tolist()
+    colors = [-1] * (len(ptr) - 1)
+    for v in range(len(colors)):
+        used = {colors[u] for u in idx[ptr[v]:ptr[v + 1]]}
+        c = 0
+        while c in used:
+            c += 1
+        colors[v] = c
+    return np.array(colors, dtype=np.int32)
+
+def subsurf_colors(mesh, topology_hash):
+    """控制顶点冲突图的着色（按拓扑缓存），颜色数即推导算子所需的求值次数"""
+    colors = SUBD_COLOR_CACHE.pop(topology_hash, None)
+    if colors is None:
+        start = time.perf_counter()
+        colors = greedy_coloring(*subsurf_conflict_graph(mesh))
+        log(f"细分冲突图着色: {colors.max() + 1} 种颜色，耗时 {time.perf_counter() - start:.2f}s")
+    SUBD_COLOR_CACHE[topology_hash] = colors
+    while len(SUBD_COLOR_CACHE) > SUBD_CACHE_SIZE:
+        SUBD_COLOR_CACHE.pop(next(iter(SUBD_COLOR_CACHE)))
+    return colors
+
+def derive_subsurf_operator(obj, depsgraph, n_out, colors):
+    """
+    Catmull-Clark 细分在拓扑固定时是控制点坐标的线性映射。
+    对互不冲突的同色控制顶点一起探测：X 写入 1，Y 写入组内序号，
+    输出的 Y/X 即可还原影响该输出顶点的控制顶点，X 即为其权重。
+    """
+    mesh = obj.data
+    n_verts = len(mesh.vertices)
+    start = time.perf_counter()
+    key_blocks = mesh.shape_keys.key_blocks
+    probe = obj.shape_key_add(name="__sk_probe__", from_mix=False)
+    obj.active_shape_key_index = len(key_blocks) - 1
+    rows, cols, vals = [], [], []
+    try:
+        for c in range(colors.max() + 1):
+            members = np.flatnonzero(colors == c)
+            co = np.zeros((n_verts, 3), dtype=np.float32)
+            co[members, 0] = 1.0
+            co[members, 1] = np.arange(1, len(members) + 1)
+            write_co(probe.data, co)
+            mesh.shape_keys.update_tag()
+            out = evaluate_pinned(obj, depsgraph).astype(np.float64)
+            if len(out) != n_out:
+                return None
+            hit = np.flatnonzero(np.abs(out[:, 0]) > SUBD_WEIGHT_EPSILON)
+            ratio = out[hit, 1] / out[hit, 0]
+            slot = np.rint(ratio).astype(np.int64)
+            if np.any(np.abs(ratio - slot) > 0.25) or np.any(slot < 1) or np.any(slot > len(members)):
+                return None
+            rows.append(hit)
+            cols.append(members[slot - 1])
+            vals.append(out[hit, 0])
+    finally:
+        obj.shape_key_remove(probe)
+    rows = np.concatenate(rows)
+    order = np.argsort(rows, kind='stable')
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_out))))
+    log(f"细分线性算子: {colors.max() + 1} 次探测, {len(rows)} 个非零项，耗时 {time.perf_counter() - start:.2f}s")
+    return indptr, np.concatenate(cols)[order], np.concatenate(vals)[order]
+
+def apply_subsurf_linear(obj, receiver, modifier_names, depsgraph, settings):
+    """仅应用一个细分修改器时，用一次推导的稀疏线性算子批量生成全部形态键"""
+    if len(modifier_names) != 1 or obj.modifiers[modifier_names[0]].type != 'SUBSURF':
+        return False
+    mod = obj.modifiers[modifier_names[0]]
+    mesh = receiver.data
+    key_blocks = obj.data.shape_keys.key_blocks
+    n_verts = len(obj.data.vertices)
+    topology_hash = mesh_topology_hash(obj.data)
+    cache_key = (topology_hash, mod.subdivision_type, mod.levels, mod.quality,
+                 mod.use_limit_surface, mod.boundary_smooth, mod.use_creases)
+    expected = read_co(mesh.vertices, len(mesh.vertices))
+    tolerance = SUBD_TOLERANCE * max(1.0, float(np.abs(expected).max(initial=0.0)))
+    def verified(operator):
+        if operator is None:
+            return None
+        base = sparse_apply(*operator, read_co(key_blocks[0].data, n_verts))
+        return operator if np.abs(base - expected).max(initial=0.0) <= tolerance else None
+    operator = verified(SUBD_OPERATOR_CACHE.pop(cache_key, None))
+    if operator is None:
+        # 推导需要每种颜色一次求值，待求值的形态键不多于颜色数时逐形态键求值更快
+        colors = subsurf_colors(obj.data, topology_hash)
+        if len(key_blocks) - 1 <= colors.max() + 1:
+            log(f"{len(key_blocks) - 1} 个形态键不多于 {colors.max() + 1} 次探测，使用逐形态键求值")
+            return False
+        operator = verified(derive_subsurf_operator(obj, depsgraph, len(expected), colors))
+    if operator is None:
+        log("细分线性算子校验失败，回退到逐形态键求值")
+        return False
+    SUBD_OPERATOR_CACHE[cache_key] = operator
+    while len(SUBD_OPERATOR_CACHE) > SUBD_CACHE_SIZE:
+        SUBD_OPERATOR_CACHE.pop(next(iter(SUBD_OPERATOR_CACHE)))
+    chunk = max(1, SUBD_CHUNK_FLOATS // max(1, len(operator[1]) * 3))
+    for start in range(1, len(key_blocks), chunk):
+        indices = range(start, min(start + chunk, len(key_blocks)))
+        out = sparse_apply(*operator, np.hstack([read_co(key_blocks[i].data, n_verts) for i in indices]))
+        for j, i in enumerate(indices):
+            kb = receiver.shape_key_add(name=settings[i]["name"], from_mix=False)
+            write_co(kb.data, out[:, 3 * j:3 * j + 3])
+    return True
+
+def deform_weights_hash(obj):
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\0".join(vg.name for vg in obj.vertex_groups).encode())
+    for array in read_vertex_weights(obj):
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+def id_fingerprint(value):
+    if value is None:
+        return None
+    if isinstance(value, bpy.types.Object):
+        parts = [value.name, tuple(tuple(row) for row in value.matrix_world)]
+        if value.type == 'ARMATURE' and value.pose:
+            parts.append(tuple(tuple(tuple(row) for row in pb.matrix) for pb in value.pose.bones))
+        elif value.type == 'MESH':
+            parts.append(mesh_topology_hash(value.data))
+            parts.append(hashlib.blake2b(read_co(value.data.vertices, len(value.data.vertices)).tobytes(), digest_size=16).hexdigest())
+        return tuple(parts)
+    return getattr(value, "name", repr(value))
+
+def modifier_stack_fingerprint(obj, modifier_names):
+    """
+    应用结果缓存使用的修改器栈指纹：网格拓扑、顶点组权重、物体变换和被应用修改器的全部设置。
+    引用的网格物体按变换与顶点坐标、骨架按姿态指纹化；几何节点等无法可靠指纹化的修改器，
+    以及引用了其他数据（晶格、曲线、纹理等）的修改器返回 None，表示不使用缓存。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(mesh_topology_hash(obj.data).encode())
+    h.update(deform_weights_hash(obj).encode())
+    h.update(repr(tuple(tuple(row) for row in obj.matrix_world)).encode())
+    for mod in obj.modifiers:
+        if mod.name not in modifier_names:
+            continue
+        if mod.type in UNCACHEABLE_MODIFIERS:
+            return None
+        h.update(mod.type.encode())
+        for prop in mod.bl_rna.properties:
+            if prop.identifier in MODIFIER_UI_PROPS or prop.type == 'COLLECTION':
+                continue
+            value = getattr(mod, prop.identifier)
+            if prop.type == 'POINTER':
+                if isinstance(value, bpy.types.ID) and not (isinstance(value, bpy.types.Object) and value.type in {'MESH', 'ARMATURE'}):
+                    # 晶格、曲线、纹理等引用数据的内容变化无法从名称看出，不使用缓存
+                    return None
+                value = id_fingerprint(value)
+            elif getattr(prop, "is_array", False):
+                value = tuple(value)
+            h.update(f"{prop.identifier}={value!r};".encode())
+    return h.digest()
+
+def apply_cache_get(cache_key):
+    if cache_key is None or cache_key not in APPLY_CACHE:
+        return None
+    APPLY_CACHE.move_to_end(cache_key)
+    return APPLY_CACHE[cache_key]
+
+def apply_cache_put(cache_key, co):
+    global apply_cache_bytes
+    if cache_key is None or co.nbytes > APPLY_CACHE_MAX_BYTES:
+        return
+    APPLY_CACHE[cache_key] = co
+    apply_cache_bytes += co.nbytes
+    while apply_cache_bytes > APPLY_CACHE_MAX_BYTES:
+        _, evicted = APPLY_CACHE.popitem(last=False)
+        apply_cache_bytes -= evicted.nbytes
+
+def apply_modifiers_depsgraph(context, obj, modifier_names):
+    """
+    通过依赖图逐个求值形态键，将结果直接写入接收网格的形态键，不创建临时对象。
+    modifier_names 中的修改器被应用并从结果对象上移除，其余修改器在求值时临时禁用。
+    """
+    key_blocks = obj.data.shape_keys.key_blocks
+    settings = capture_shapekey_settings(key_blocks)
+    receiver = obj.copy()
+    for name in modifier_names:
+        receiver.modifiers.remove(receiver.modifiers[name])
+    pin_state = (obj.show_only_shape_key, obj.active_shape_key_index)
+    mod_state = [(mod.name, mod.show_viewport) for mod in obj.modifiers]
+    key_state = [(kb.mute, kb.vertex_group) for kb in key_blocks]
+    for mod in obj.modifiers:
+        mod.show_viewport = mod.name in modifier_names
+    # 固定形态键时静音和顶点组遮罩会改变求值结果，与旧流程保持一致需暂时清除
+    for kb in key_blocks:
+        kb.mute = False
+        kb.vertex_group = ""
+    obj.show_only_shape_key = True
+    mesh = None
+    stats = {"hits": 0, "misses": 0, "linear": False}
+    try:
+        depsgraph = context.evaluated_depsgraph_get()
+        obj.active_shape_key_index = 0
+        obj.update_tag()
+        depsgraph.update()
+        mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph)
+        receiver.data = mesh
+        receiver.shape_key_add(name=settings[0]["name"], from_mix=False)
+        stats["linear"] = apply_subsurf_linear(obj, receiver, modifier_names, depsgraph, settings)
+        if not stats["linear"]:
+            n_verts = len(obj.data.vertices)
+            stack_key = modifier_stack_fingerprint(obj, modifier_names)
+            for i in range(1, len(key_blocks)):
+                cache_key = None
+                if stack_key is not None:
+                    source = read_co(key_blocks[i].data, n_verts)
+                    cache_key = (stack_key, hashlib.blake2b(source.tobytes(), digest_size=16).digest())
+                co = apply_cache_get(cache_key)
+                if co is None:
+                    stats["misses"] += 1
+                    obj.active_shape_key_index = i
+                    co = evaluate_pinned(obj, depsgraph)
+                    apply_cache_put(cache_key, co)
+                else:
+                    stats["hits"] += 1
+                if len(co) != len(mesh.vertices):
+                    raise RuntimeError(f"形态键 {settings[i]['name']} 求值后顶点数不一致，修改器改变了拓扑")
+                kb = receiver.shape_key_add(name=settings[i]["name"], from_mix=False)
+                write_co(kb.data, co)
+    except Exception:
+        bpy.data.objects.remove(receiver)
+        if mesh is not None:
+            bpy.data.meshes.remove(mesh)
+        raise
+    finally:
+        for kb, (mute, vertex_group) in zip(key_blocks, key_state):
+            kb.mute = mute
+            kb.vertex_group = vertex_group
+        for name, show_viewport in mod_state:
+            obj.modifiers[name].show_viewport = show_viewport
+        obj.show_only_shape_key, obj.active_shape_key_index = pin_state
+    restore_shapekey_settings(receiver.data.shape_keys.key_blocks, settings)
+    receiver.active_shape_key_index = pin_state[1]
+    for coll in obj.users_collection:
+        coll.objects.link(receiver)
+    replace_object(obj, receiver)
+    for o in context.view_layer.objects:
+        o.select_set(False)
+    receiver.select_set(True)
+    context.view_layer.objects.active = receiver
+    return stats
+
+def evaluate_with_modifiers(context, obj, modifier_names, key_index=0):
+    """只启用指定修改器，对固定的形态键求值一次并恢复原状态"""
+    key_blocks = obj.data.shape_keys.key_blocks
+    pin_state = (obj.show_only_shape_key, obj.active_shape_key_index)
+    mod_state = [(mod.name, mod.show_viewport) for mod in obj.modifiers]
+    kb = key_blocks[key_index]
+    key_state = (kb.mute, kb.vertex_group)
+    for mod in obj.modifiers:
+        mod.show_viewport = mod.name in modifier_names
+    kb.mute = False
+    kb.vertex_group = ""
+    obj.show_only_shape_key = True
+    obj.active_shape_key_index = key_index
+    try:
+        return evaluate_pinned(obj, context.evaluated_depsgraph_get())
+    finally:
+        kb.mute, kb.vertex_group = key_state
+        for name, show_viewport in mod_state:
+            obj.modifiers[name].show_viewport = show_viewport
+        obj.show_only_shape_key, obj.active_shape_key_index = pin_state
+        obj.update_tag()
+
+def armature_skinning_matrices(obj, mod):
+    """
+    由顶点组权重和当前姿态计算每个顶点的线性混合蒙皮矩阵 (V, 3, 4)，作用于物体空间坐标。
+    与骨架修改器一致：只使用形变骨骼对应的顶点组，权重和不超过 0.0001 的顶点保持不动，
+    修改器自身的顶点组按权重在原位置与形变结果之间插值。
+    """
+    arm = mod.object
+    count = len(obj.data.vertices)
+    to_arm = np.array(arm.matrix_world.inverted() @ obj.matrix_world)
+    from_arm = np.linalg.inv(to_arm)
+    group_matrices = np.zeros((len(obj.vertex_groups), 3, 4))
+    deform = np.zeros(len(obj.vertex_groups), dtype=bool)
+    for vg in obj.vertex_groups:
+        pose_bone = arm.pose.bones.get(vg.name)
+        if pose_bone is None or not pose_bone.bone.use_deform:
+            continue
+        bone_matrix = np.array(pose_bone.matrix @ pose_bone.bone.matrix_local.inverted())
+        group_matrices[vg.index] = (from_arm @ bone_matrix @ to_arm)[:3]
+        deform[vg.index] = True
+    csr = read_vertex_weights(obj)
+    indptr, groups, weights = csr
+    rows = csr_rows(indptr)
+    used = deform[groups] & (weights > 0)
+    rows, groups, weights = rows[used], groups[used], weights[used].astype(np.float64)
+    total = np.bincount(rows, weights, minlength=count)
+    blended = np.empty((count, 12))
+    flat = group_matrices.reshape(-1, 12)
+    for j in range(12):
+        blended[:, j] = np.bincount(rows, weights * flat[groups, j], minlength=count)
+    identity = np.eye(3, 4).ravel()
+    affected = total > 0.0001
+    blended[affected] /= total[affected, None]
+    blended[~affected] = identity
+    vg = obj.vertex_groups.get(mod.vertex_group) if mod.vertex_group else None
+    if vg is not None:
+        # 与骨架修改器一致，网格上不存在的顶点组视为未设置
+        factor = group_weights(csr, vg.index)
+        if mod.invert_vertex_group:
+            factor = 1.0 - factor
+        blended = identity + factor[:, None] * (blended - identity)
+    return blended.reshape(count, 3, 4)
+
+def skin_co(matrices, co):
+    return np.einsum('vij,vj->vi', matrices[:, :, :3], co) + matrices[:, :, 3]
+
+def run_depsgraph_engine(operator, context, obj, modifier_names):
+    start = time.perf_counter()
+    try:
+        stats = apply_modifiers_depsgraph(context, obj, modifier_names)
+    except RuntimeError as e:
+        operator.report({'ERROR'}, str(e))
+        return {'CANCELLED'}
+    elapsed = time.perf_counter() - start
+    log(f"依赖图求值完成，耗时 {elapsed:.2f}s")
+    if stats["linear"]:
+        operator.report({'INFO'}, f"已通过细分线性算子应用，耗时 {elapsed:.2f}s")
+    else:
+        operator.report({'INFO'}, f"已应用修改器，缓存命中 {stats['hits']} / 未命中 {stats['misses']}，耗时 {elapsed:.2f}s")
+    return {'FINISHED'}
 
 class SK_TYPE_Resource(PropertyGroup):
     selected: BoolProperty(name="Selected", default=False)
 
+class SK_TYPE_MixEntry(PropertyGroup):
+    selected: BoolProperty(name="Selected", default=False)
+    weight: bpy.props.FloatProperty(name="Weight", default=1.0, soft_min=-1.0, soft_max=1.0)  # type: ignore
+
+def fill_shape_key_entries(entries, obj):
+    entries.clear()
+    for kb in obj.data.shape_keys.key_blocks[1:]:
+        entry = entries.add()
+        entry.name = kb.name
+
 class SK_OT_apply_mods_SK(Operator):
     bl_idname = "sk_tools.apply_mods_sk"
     bl_label = "应用全部修改器"
@@ -115,6 +844,11 @@ class SK_OT_apply_mods_SK(Operator):
         self.obj = context.active_object
         if self.validate_input(self.obj) == {'CANCELLED'}:
             return {'CANCELLED'}
+        if context.scene.sk_keeper_engine == 'DEPSGRAPH':
+            for mod in self.obj.modifiers:
+                if mod.type == 'SUBSURF':
+                    mod.show_only_control_edges = False
+            return run_depsgraph_engine(self, context, self.obj, [mod.name for mod in self.obj.modifiers if mod.show_viewport])
         sk_names = [block.name for block in self.obj.data.shape_keys.key_blocks]
         receiver = copy_object(self.obj, times=1, offset=0)[0]
         receiver.name = "sk_receiver"
@@ -161,6 +895,10 @@ class SK_OT_apply_subd_SK(Operator):
         self.obj = context.active_object
         if self.validate_input(self.obj) == {'CANCELLED'}:
             return {'CANCELLED'}
+        if context.scene.sk_keeper_engine == 'DEPSGRAPH':
+            subd = [mod for mod in self.obj.modifiers if mod.type == 'SUBSURF'][0]
+            subd.show_only_control_edges = False
+            return run_depsgraph_engine(self, context, self.obj, [subd.name])
         sk_names = [block.name for block in self.obj.data.shape_keys.key_blocks]
         receiver = copy_object(self.obj, times=1, offset=0)[0]
         receiver.name = "sk_receiver"
@@ -199,6 +937,8 @@ class SK_OT_apply_mods_choice_SK(Operator):
             entry.name = mod.name
         return context.window_manager.invoke_props_dialog(self, width=350)
     def execute(self, context):
+        if context.scene.sk_keeper_engine == 'DEPSGRAPH':
+            return run_depsgraph_engine(self, context, self.obj, [entry.name for entry in self.resource_list if entry.selected])
         sk_names = [block.name for block in self.obj.data.shape_keys.key_blocks]
         receiver = copy_object(self.obj, times=1, offset=0)[0]
         receiver.name = "sk_receiver"
@@ -232,6 +972,42 @@ class SK_OT_apply_mods_choice_SK(Operator):
             row = col.row()
             row.prop(entry, 'selected', text=entry.name)
 
+class SK_OT_apply_armature_SK(Operator):
+    """把当前姿态作为静止姿态应用骨架修改器，并用批量线性混合蒙皮保留全部形态键"""
+    bl_idname = "sk_tools.apply_armature_sk"
+    bl_label = "应用骨架修改器"
+    bl_options = {'REGISTER', 'UNDO'}
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        mods = [mod for mod in obj.modifiers if mod.type == 'ARMATURE' and mod.object]
+        if not mods:
+            self.report({'ERROR'}, "没有指定骨架的骨架修改器")
+            return {'CANCELLED'}
+        mod = mods[0]
+        if mod.use_deform_preserve_volume or mod.use_bone_envelopes or not mod.use_vertex_groups or mod.use_multi_modifier:
+            log("骨架修改器使用了保持体积/封套/多重修改器，回退到依赖图求值")
+            return run_depsgraph_engine(self, context, obj, [mod.name])
+        start = time.perf_counter()
+        key_blocks = obj.data.shape_keys.key_blocks
+        count = len(obj.data.vertices)
+        matrices = armature_skinning_matrices(obj, mod)
+        expected = evaluate_with_modifiers(context, obj, [mod.name])
+        base = skin_co(matrices, read_co(key_blocks[0].data, count))
+        tolerance = ARMATURE_TOLERANCE * max(1.0, float(np.abs(expected).max(initial=0.0)))
+        if len(expected) != count or np.abs(base - expected).max(initial=0.0) > tolerance:
+            log("线性混合蒙皮结果与骨架修改器不一致，回退到依赖图求值")
+            return run_depsgraph_engine(self, context, obj, [mod.name])
+        for kb in key_blocks:
+            write_co(kb.data, skin_co(matrices, read_co(kb.data, count)))
+        write_co(obj.data.vertices, read_co(key_blocks[0].data, count))
+        obj.modifiers.remove(mod)
+        obj.data.update()
+        self.report({'INFO'}, f"已通过线性混合蒙皮应用骨架修改器到 {len(key_blocks)} 个形态键，耗时 {time.perf_counter() - start:.2f}s")
+        return {'FINISHED'}
+
 class SK_OT_sort_deform_shape_keys(Operator):
     bl_idname = "sk_tools.sort_deform_sk"
     bl_label = "排序Deform形态键"
@@ -265,16 +1041,41 @@ class SK_OT_sort_deform_shape_keys(Operator):
             self.report({'WARNING'}, "未找到前缀为Deform的形态键")
             return {'CANCELLED'}
         deform_keys.sort(key=lambda x: x[0])
-        for num, key_name in reversed(deform_keys):
-            idx = key_blocks.find(key_name)
-            if idx > 0:
-                for _ in range(idx, 1, -1):
-                    obj.active_shape_key_index = idx
-                    bpy.ops.object.shape_key_move(type='UP')
-                    idx -= 1
+        reorder_shape_keys(obj, [name for num, name in deform_keys])
         self.report({'INFO'}, "已按数字顺序对Deform形态键排序")
         return {'FINISHED'}
 
+class SK_OT_sort_shape_keys_from_file(Operator):
+    """按文本文件中的名称列表（每行一个）排序形态键"""
+    bl_idname = "sk_tools.sort_sk_from_file"
+    bl_label = "按列表排序形态键"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")  # type: ignore
+    filter_glob: bpy.props.StringProperty(default="*.txt", options={'HIDDEN'})  # type: ignore
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        try:
+            order = read_name_list(self.filepath)
+        except Exception as e:
+            self.report({'ERROR'}, f"加载文件失败：{str(e)}")
+            return {'CANCELLED'}
+        key_blocks = obj.data.shape_keys.key_blocks
+        missing = [name for name in order if name not in key_blocks]
+        moved = reorder_shape_keys(obj, order)
+        if missing:
+            self.report({'WARNING'}, f"列表中有 {len(missing)} 个名称不存在，已忽略")
+        self.report({'INFO'}, f"已按列表重排 {moved} 个形态键")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
 class SK_OT_remove_empty_shape_keys(Operator):
     bl_idname = "sk_tools.remove_empty_sk"
     bl_label = "删除无位移形态键"
@@ -293,30 +1094,212 @@ class SK_OT_remove_empty_shape_keys(Operator):
         obj = context.active_object
         if self.validate_input(obj) == {'CANCELLED'}:
             return {'CANCELLED'}
-        shape_keys = obj.data.shape_keys.key_blocks
-        base_verts = obj.data.vertices
-        if "Basis" in shape_keys:
-            base_verts = shape_keys["Basis"].data
-        to_remove_names = []
-        for shape_key in shape_keys:
-            if shape_key.name == "Basis":
-                continue
-            if not has_vertex_displacement(obj, shape_key, base_verts):
-                to_remove_names.append(shape_key.name)
-        context.view_layer.objects.active = obj
-        for name in to_remove_names:
-            for i, shape_key in enumerate(shape_keys):
-                if shape_key.name == name:
-                    obj.active_shape_key_index = i
-                    log(f"删除无位移形态键: {name}")
-                    bpy.ops.object.shape_key_remove()
-                    break
+        to_remove_names = prune_shape_keys(obj, remove_empty=True)
         if to_remove_names:
             self.report({'INFO'}, f"已删除 {len(to_remove_names)} 个无位移形态键")
         else:
             self.report({'INFO'}, "未找到无位移形态键")
         return {'FINISHED'}
 
+class SK_OT_remove_duplicate_shape_keys(Operator):
+    bl_idname = "sk_tools.remove_duplicate_sk"
+    bl_label = "合并重复形态键"
+    bl_options = {'REGISTER', 'UNDO'}
+    epsilon: bpy.props.FloatProperty(name="容差", description="逐顶点位移差小于该值视为重复", default=1e-5, min=0.0, precision=6)  # type: ignore
+    collapse: BoolProperty(name="删除重复项", description="每组只保留第一个形态键", default=True)  # type: ignore
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        groups = find_duplicate_shape_keys(obj.data.shape_keys.key_blocks, max(self.epsilon, 1e-9))
+        for names in groups:
+            log(f"重复形态键: 保留 {names[0]}，重复 {', '.join(names[1:])}")
+        if not groups:
+            self.report({'INFO'}, "未找到重复形态键")
+            return {'FINISHED'}
+        duplicates = [name for names in groups for name in names[1:]]
+        if self.collapse:
+            # 与代表项参照键相同的重复项绝对坐标也相同，以其为参照的形态键改指向代表项；
+            # 参照键不同时绝对坐标不同，仍按默认规则指向上级参照键
+            key_blocks = obj.data.shape_keys.key_blocks
+            replacements = {
+                name: names[0] for names in groups for name in names[1:]
+                if key_blocks[name].relative_key == key_blocks[names[0]].relative_key
+            }
+            remove_shape_keys(obj, duplicates, replacements)
+            self.report({'INFO'}, f"{len(groups)} 组重复形态键，已删除 {len(duplicates)} 个")
+        else:
+            self.report({'INFO'}, f"{len(groups)} 组重复形态键，共 {len(duplicates)} 个重复项（详见控制台）")
+        return {'FINISHED'}
+
+class SK_OT_prune_shape_key_noise(Operator):
+    bl_idname = "sk_tools.prune_sk_noise"
+    bl_label = "清理形态键噪声"
+    bl_options = {'REGISTER', 'UNDO'}
+    threshold: bpy.props.FloatProperty(name="阈值", description="位移长度小于该值的顶点视为未移动", default=1e-4, min=0.0, precision=6)  # type: ignore
+    report_only: BoolProperty(name="仅报告", description="只统计稀疏度，不修改形态键", default=False)  # type: ignore
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys or len(obj.data.shape_keys.key_blocks) < 2:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        count = len(obj.data.vertices)
+        stats = prune_delta_noise(obj.data.shape_keys.key_blocks, self.threshold, apply=not self.report_only)
+        for entry in stats:
+            if entry["moved"]:
+                lo, hi = entry["bbox"]
+                log(f"{entry['name']}: {entry['moved']}/{count} 顶点, 索引 {entry['index_range'][0]}-{entry['index_range'][1]}, "
+                    f"包围盒 ({lo[0]:.4f}, {lo[1]:.4f}, {lo[2]:.4f}) - ({hi[0]:.4f}, {hi[1]:.4f}, {hi[2]:.4f})")
+            else:
+                log(f"{entry['name']}: 无移动顶点")
+        moved = sum(entry["moved"] for entry in stats)
+        dense_mb = len(stats) * count * 12 / 1048576
+        sparse_mb = moved * 16 / 1048576
+        action = "统计" if self.report_only else "清理"
+        self.report({'INFO'}, f"已{action} {len(stats)} 个形态键，移动顶点 {moved}，稀疏缓冲约 {sparse_mb:.2f} MB / 密集 {dense_mb:.2f} MB")
+        return {'FINISHED'}
+
+class SK_OT_mix_shape_keys(Operator):
+    bl_idname = "sk_tools.mix_sk"
+    bl_label = "混合形态键"
+    bl_options = {'REGISTER', 'UNDO'}
+    entries: CollectionProperty(name="Shape Keys", type=SK_TYPE_MixEntry)  # type: ignore
+    result_name: bpy.props.StringProperty(name="结果名称", default="Mix")  # type: ignore
+    mask_group: bpy.props.StringProperty(name="遮罩顶点组", description="可选，按该顶点组权重衰减混合结果")  # type: ignore
+    remove_sources: BoolProperty(name="删除源形态键", default=False)  # type: ignore
+    def invoke(self, context, event):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys or len(obj.data.shape_keys.key_blocks) < 2:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        fill_shape_key_entries(self.entries, obj)
+        return context.window_manager.invoke_props_dialog(self, width=350)
+    def execute(self, context):
+        obj = context.active_object
+        weighted = [(entry.name, entry.weight) for entry in self.entries if entry.selected]
+        if not weighted:
+            self.report({'WARNING'}, "未选择形态键")
+            return {'CANCELLED'}
+        try:
+            co = mix_shape_keys(obj, weighted, mask_weights(obj, self.mask_group))
+        except (KeyError, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        kb = obj.shape_key_add(name=self.result_name, from_mix=False)
+        write_co(kb.data, co)
+        if self.remove_sources:
+            remove_shape_keys(obj, [name for name, weight in weighted])
+        obj.active_shape_key_index = obj.data.shape_keys.key_blocks.find(kb.name)
+        self.report({'INFO'}, f"已将 {len(weighted)} 个形态键混合为 {kb.name}")
+        return {'FINISHED'}
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "result_name")
+        layout.prop_search(self, "mask_group", context.active_object, "vertex_groups")
+        layout.prop(self, "remove_sources")
+        col = layout.column(align=True)
+        for entry in self.entries:
+            row = col.row()
+            row.prop(entry, 'selected', text=entry.name)
+            row.prop(entry, 'weight', text="")
+
+class SK_OT_split_shape_keys(Operator):
+    bl_idname = "sk_tools.split_sk"
+    bl_label = "左右拆分形态键"
+    bl_options = {'REGISTER', 'UNDO'}
+    entries: CollectionProperty(name="Shape Keys", type=SK_TYPE_MixEntry)  # type: ignore
+    left_group: bpy.props.StringProperty(name="左侧顶点组")  # type: ignore
+    right_group: bpy.props.StringProperty(name="右侧顶点组", description="留空时使用 1 - 左侧权重")  # type: ignore
+    left_suffix: bpy.props.StringProperty(name="左侧后缀", default="_L")  # type: ignore
+    right_suffix: bpy.props.StringProperty(name="右侧后缀", default="_R")  # type: ignore
+    remove_sources: BoolProperty(name="删除源形态键", default=False)  # type: ignore
+    def invoke(self, context, event):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys or len(obj.data.shape_keys.key_blocks) < 2:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        fill_shape_key_entries(self.entries, obj)
+        return context.window_manager.invoke_props_dialog(self, width=350)
+    def execute(self, context):
+        obj = context.active_object
+        names = [entry.name for entry in self.entries if entry.selected]
+        if not names:
+            self.report({'WARNING'}, "未选择形态键")
+            return {'CANCELLED'}
+        if not self.left_group:
+            self.report({'ERROR'}, "请指定左侧顶点组")
+            return {'CANCELLED'}
+        try:
+            csr = read_vertex_weights(obj)
+            left = mask_weights(obj, self.left_group, csr)
+            right = mask_weights(obj, self.right_group, csr)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        if right is None:
+            right = 1.0 - left
+        created = split_shape_keys(obj, names, left, right, (self.left_suffix, self.right_suffix))
+        if self.remove_sources:
+            remove_shape_keys(obj, names)
+        self.report({'INFO'}, f"已拆分 {len(names)} 个形态键，新建 {len(created)} 个")
+        return {'FINISHED'}
+    def draw(self, context):
+        layout = self.layout
+        obj = context.active_object
+        layout.prop_search(self, "left_group", obj, "vertex_groups")
+        layout.prop_search(self, "right_group", obj, "vertex_groups")
+        row = layout.row(align=True)
+        row.prop(self, "left_suffix")
+        row.prop(self, "right_suffix")
+        layout.prop(self, "remove_sources")
+        col = layout.column(align=True)
+        for entry in self.entries:
+            col.prop(entry, 'selected', text=entry.name)
+
+class SK_OT_transfer_shape_keys(Operator):
+    bl_idname = "sk_tools.transfer_sk"
+    bl_label = "传递形态键"
+    bl_options = {'REGISTER', 'UNDO'}
+    max_distance: bpy.props.FloatProperty(name="最大距离", description="目标顶点到源表面距离超过该值时不传递位移，0 表示不限制", default=0.0, min=0.0)  # type: ignore
+    def execute(self, context):
+        source = context.scene.sk_transfer_source
+        target = context.active_object
+        if not source or source.type != 'MESH' or not source.data.shape_keys or len(source.data.shape_keys.key_blocks) < 2:
+            self.report({'ERROR'}, "源对象必须是带有形态键的网格")
+            return {'CANCELLED'}
+        if not target or target.type != 'MESH' or target == source:
+            self.report({'ERROR'}, "请选择一个与源对象不同的网格对象")
+            return {'CANCELLED'}
+        start = time.perf_counter()
+        transferred = transfer_shape_keys(source, target, self.max_distance)
+        self.report({'INFO'}, f"已从 {source.name} 传递 {len(transferred)} 个形态键，耗时 {time.perf_counter() - start:.2f}s")
+        return {'FINISHED'}
+
+class SK_OT_export_sparse_shape_keys(Operator):
+    """导出稀疏形态键位移缓冲（顶点索引 + 位移）"""
+    bl_idname = "sk_tools.export_sparse_sk"
+    bl_label = "导出稀疏形态键"
+    directory: bpy.props.StringProperty(subtype="DIR_PATH")  # type: ignore
+    threshold: bpy.props.FloatProperty(name="阈值", description="任一分量位移超过该值的顶点才会导出", default=1e-6, min=0.0, precision=7)  # type: ignore
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH' or not obj.data.shape_keys or len(obj.data.shape_keys.key_blocks) < 2:
+            self.report({'ERROR'}, "请选择一个带有形态键的网格对象")
+            return {'CANCELLED'}
+        start = time.perf_counter()
+        try:
+            rows = export_sparse_shape_keys(obj, bpy.path.abspath(self.directory), self.threshold)
+        except OSError as e:
+            self.report({'ERROR'}, f"导出失败: {str(e)}")
+            return {'CANCELLED'}
+        count = len(obj.data.shape_keys.key_blocks) - 1
+        self.report({'INFO'}, f"已导出 {count} 个形态键，共 {rows} 个移动顶点（{rows * 16 / 1048576:.2f} MB），耗时 {time.perf_counter() - start:.2f}s")
+        return {'FINISHED'}
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
 class SK_OT_remove_deform_shape_keys(Operator):
     bl_idname = "sk_tools.remove_deform_sk"
     bl_label = "删除Deform形态键"
@@ -335,16 +1318,7 @@ class SK_OT_remove_deform_shape_keys(Operator):
         obj = context.active_object
         if self.validate_input(obj) == {'CANCELLED'}:
             return {'CANCELLED'}
-        shape_keys = obj.data.shape_keys.key_blocks
-        to_remove_names = [sk.name for sk in shape_keys if sk.name.startswith("Deform")]
-        context.view_layer.objects.active = obj
-        for name in to_remove_names:
-            for i, shape_key in enumerate(shape_keys):
-                if shape_key.name == name:
-                    obj.active_shape_key_index = i
-                    log(f"删除Deform形态键: {name}")
-                    bpy.ops.object.shape_key_remove()
-                    break
+        to_remove_names = prune_shape_keys(obj, name_pattern=r"Deform")
         if to_remove_names:
             self.report({'INFO'}, f"已删除 {len(to_remove_names)} 个Deform形态键")
         else:
@@ -352,29 +1326,73 @@ class SK_OT_remove_deform_shape_keys(Operator):
         return {'FINISHED'}
 
 def draw_panel(layout, context):
+    row = layout.row(align=True)
+    row.prop(context.scene, "sk_keeper_engine", expand=True)
     row = layout.row(align=True)
     row.operator("sk_tools.apply_mods_sk")
     row.operator("sk_tools.apply_subd_sk")
     row.operator("sk_tools.apply_mods_choice_sk")
+    row.operator("sk_tools.apply_armature_sk")
     row = layout.row(align=True)
     row.operator("sk_tools.sort_deform_sk")
+    row.operator("sk_tools.sort_sk_from_file")
+    row.operator("sk_tools.prune_sk_noise")
+    row = layout.row(align=True)
     row.operator("sk_tools.remove_empty_sk")
+    row.operator("sk_tools.remove_duplicate_sk")
     row.operator("sk_tools.remove_deform_sk")
+    row = layout.row(align=True)
+    row.operator("sk_tools.mix_sk")
+    row.operator("sk_tools.split_sk")
+    row = layout.row(align=True)
+    row.prop(context.scene, "sk_transfer_source", text="源")
+    row.operator("sk_tools.transfer_sk")
+    layout.operator("sk_tools.export_sparse_sk", icon='EXPORT')
 
 def register():
+    bpy.types.Scene.sk_keeper_engine = EnumProperty(
+        name="Engine",
+        description="应用修改器时保留形态键的求值方式",
+        items=[
+            ('DEPSGRAPH', "依赖图求值", "逐个形态键通过依赖图求值并直接写入结果，不创建临时对象"),
+            ('COPY', "对象副本", "旧流程：为每个形态键复制对象并应用修改器后合并"),
+        ],
+        default='DEPSGRAPH'
+    )
+    bpy.types.Scene.sk_transfer_source = bpy.props.PointerProperty(name="Source", description="提供形态键的源网格对象", type=bpy.types.Object)
     bpy.utils.register_class(SK_TYPE_Resource)
+    bpy.utils.register_class(SK_TYPE_MixEntry)
     bpy.utils.register_class(SK_OT_apply_mods_SK)
     bpy.utils.register_class(SK_OT_apply_subd_SK)
     bpy.utils.register_class(SK_OT_apply_mods_choice_SK)
+    bpy.utils.register_class(SK_OT_apply_armature_SK)
     bpy.utils.register_class(SK_OT_sort_deform_shape_keys)
+    bpy.utils.register_class(SK_OT_sort_shape_keys_from_file)
     bpy.utils.register_class(SK_OT_remove_empty_shape_keys)
+    bpy.utils.register_class(SK_OT_remove_duplicate_shape_keys)
+    bpy.utils.register_class(SK_OT_prune_shape_key_noise)
+    bpy.utils.register_class(SK_OT_mix_shape_keys)
+    bpy.utils.register_class(SK_OT_split_shape_keys)
+    bpy.utils.register_class(SK_OT_transfer_shape_keys)
+    bpy.utils.register_class(SK_OT_export_sparse_shape_keys)
     bpy.utils.register_class(SK_OT_remove_deform_shape_keys)
 
 def unregister():
     bpy.utils.unregister_class(SK_OT_remove_deform_shape_keys)
+    bpy.utils.unregister_class(SK_OT_export_sparse_shape_keys)
+    bpy.utils.unregister_class(SK_OT_transfer_shape_keys)
+    bpy.utils.unregister_class(SK_OT_split_shape_keys)
+    bpy.utils.unregister_class(SK_OT_mix_shape_keys)
+    bpy.utils.unregister_class(SK_OT_prune_shape_key_noise)
+    bpy.utils.unregister_class(SK_OT_remove_duplicate_shape_keys)
     bpy.utils.unregister_class(SK_OT_remove_empty_shape_keys)
+    bpy.utils.unregister_class(SK_OT_sort_shape_keys_from_file)
     bpy.utils.unregister_class(SK_OT_sort_deform_shape_keys)
+    bpy.utils.unregister_class(SK_OT_apply_armature_SK)
     bpy.utils.unregister_class(SK_OT_apply_mods_choice_SK)
     bpy.utils.unregister_class(SK_OT_apply_subd_SK)
     bpy.utils.unregister_class(SK_OT_apply_mods_SK)
-    bpy.utils.unregister_class(SK_TYPE_Resource)
\ No newline at end of file
+    bpy.utils.unregister_class(SK_TYPE_MixEntry)
+    bpy.utils.unregister_class(SK_TYPE_Resource)
+    del bpy.types.Scene.sk_keeper_engine
+    del bpy.types.Scene.sk_transfer_source
\ No newline at end of file
@@ -8,6 +8,29 @@ bl_info = {
 }
 
 import bpy
+import numpy as np
+from ..vertex_group_data.vertex_group_data import read_vertex_weights, write_vertex_weights, csr_rows, csr_from_entries, natural_order, reorder_vertex_groups, benchmark_vertex_weights, THROUGHPUT_TARGET
+
+def combine_vertex_groups(obj, vgroup_num):
+    """把名称前缀（第一个 "." 之前）为 0..vgroup_num 的顶点组按顶点求和合并为以数字命名的组，一次读写全部权重"""
+    indptr, groups, weights = read_vertex_weights(obj)
+    prefix = np.full(len(obj.vertex_groups) + 1, -1, dtype=np.int64)
+    for vg in obj.vertex_groups:
+        head = vg.name.split(".")[0]
+        if head.isdecimal() and head == f"{int(head)}" and int(head) <= vgroup_num:
+            prefix[vg.index] = int(head)
+    nums = prefix[groups]
+    mask = nums >= 0
+    keys = csr_rows(indptr)[mask] * (vgroup_num + 1) + nums[mask]
+    keys, inverse = np.unique(keys, return_inverse=True)
+    combined = np.minimum(np.bincount(inverse, weights=weights[mask], minlength=len(keys)), 1.0)
+    keep = combined > 0
+    for vg in reversed(obj.vertex_groups[:]):
+        if prefix[vg.index] >= 0:
+            obj.vertex_groups.remove(vg)
+    index = np.array([obj.vertex_groups.new(name=f"{num}").index for num in range(vgroup_num + 1)], dtype=np.int32)
+    csr = csr_from_entries(len(indptr) - 1, keys[keep] // (vgroup_num + 1), index[keys[keep] % (vgroup_num + 1)], combined[keep])
+    write_vertex_weights(obj, csr, replace=index.tolist())
 
 class VertexGroupCombinerOperator(bpy.types.Operator):
     bl_idname = "sk_tools.combine_vertex_groups"
@@ -20,24 +43,8 @@ class VertexGroupCombinerOperator(bpy.types.Operator):
         if not obj or obj.type != 'MESH':
             self.report({'ERROR'}, "没有选中的网格对象。")
             return {'CANCELLED'}
-        for num in range(0, vgroup_num + 1):
-            relevant = [x.name for x in obj.vertex_groups if x.name.split(".")[0] == f"{num}"]
-            vgroup = obj.vertex_groups.new(name=f"x{num}")
-            for vert_id, vert in enumerate(obj.data.vertices):
-                available_groups = [v_group_elem.group for v_group_elem in vert.groups]
-                combined = 0
-                for v in relevant:
-                    if obj.vertex_groups[v].index in available_groups:
-                        combined += obj.vertex_groups[v].weight(vert_id)
-                if combined > 0:
-                    vgroup.add([vert_id], combined, 'ADD')
-            for vg in [x for x in obj.vertex_groups if x.name.split(".")[0] == f"{num}"]:
-                obj.vertex_groups.remove(vg)
-            for vg in obj.vertex_groups:
-                if vg.name[0].lower() == "x":
-                    vg.name = vg.name[1:]
-        bpy.context.view_layer.objects.active = obj
-        bpy.ops.object.vertex_group_sort()
+        combine_vertex_groups(obj, vgroup_num)
+        reorder_vertex_groups(obj, natural_order(obj))
         self.report({'INFO'}, f"已合并顶点组至 {vgroup_num}。")
         return {'FINISHED'}
 
@@ -95,9 +102,8 @@ class SortVertexGroupsOperator(bpy.types.Operator):
             self.report({'WARNING'}, "选中的对象没有顶点组。")
             return {'CANCELLED'}
         
-        bpy.context.view_layer.objects.active = obj
-        bpy.ops.object.vertex_group_sort()
-        self.report({'INFO'}, "顶点组已按名称排序。")
+        reorder_vertex_groups(obj, natural_order(obj))
+        self.report({'INFO'}, "顶点组已按数字顺序排序。")
         return {'FINISHED'}
 
 class RemoveUnusedVertexGroupsOperator(bpy.types.Operator):
@@ -114,12 +120,9 @@ class RemoveUnusedVertexGroupsOperator(bpy.types.Operator):
             self.report({'WARNING'}, "选中的对象没有顶点组。")
             return {'CANCELLED'}
         
-        # 遍历所有顶点，记录使用的顶点组索引
-        used_groups = set()
-        for vert in obj.data.vertices:
-            for group_elem in vert.groups:
-                if group_elem.weight > 0:  # 只考虑权重大于0的顶点组
-                    used_groups.add(group_elem.group)
+        # 一次读取全部权重，记录使用的顶点组索引
+        indptr, groups, weights = read_vertex_weights(obj)
+        used_groups = set(np.unique(groups[weights > 0]).tolist())  # 只考虑权重大于0的顶点组
         
         # 找出并移除未使用的顶点组
         removed_count = 0
@@ -134,6 +137,21 @@ class RemoveUnusedVertexGroupsOperator(bpy.types.Operator):
             self.report({'INFO'}, "没有找到未使用的顶点组。")
         return {'FINISHED'}
 
+class BenchmarkVertexWeightsOperator(bpy.types.Operator):
+    bl_idname = "sk_tools.benchmark_vertex_weights"
+    bl_label = "权重读写测速"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        obj = bpy.context.active_object
+        if not obj or obj.type != 'MESH' or not obj.vertex_groups:
+            self.report({'ERROR'}, "请选择一个带有顶点组的网格对象。")
+            return {'CANCELLED'}
+        read_rate, write_rate, entries = benchmark_vertex_weights(obj)
+        status = "达标" if min(read_rate, write_rate) >= THROUGHPUT_TARGET else "未达标"
+        self.report({'INFO'}, f"{entries} 个权重项：读取 {read_rate / 1e6:.2f}M/s，写入 {write_rate / 1e6:.2f}M/s（目标 {THROUGHPUT_TARGET / 1e6:.1f}M/s，{status}）")
+        return {'FINISHED'}
+
 def draw_panel(layout, context):
     # 第一行：去除未使用顶点组 和 排列顶点组
     row1 = layout.row(align=True)
@@ -146,11 +164,14 @@ def draw_panel(layout, context):
     row2.operator("sk_tools.combine_vertex_groups", text="合并至指定值")
     row2.operator("sk_tools.in_one_button", text="合并至最大值")
 
+    layout.operator("sk_tools.benchmark_vertex_weights", text="权重读写测速")
+
 def register():
     bpy.utils.register_class(VertexGroupCombinerOperator)
     bpy.utils.register_class(InOneButtonOperator)
     bpy.utils.register_class(SortVertexGroupsOperator)
     bpy.utils.register_class(RemoveUnusedVertexGroupsOperator)  # 注册新操作
+    bpy.utils.register_class(BenchmarkVertexWeightsOperator)
     # Register the scene property for vgroup_num
     bpy.types.Scene.vgroup_num = bpy.props.IntProperty(
         name="Max Group Number",
@@ -160,6 +181,7 @@ def register():
     )
 
 def unregister():
+    bpy.utils.unregister_class(BenchmarkVertexWeightsOperator)
     bpy.utils.unregister_class(RemoveUnusedVertexGroupsOperator)  # 注销新操作
     bpy.utils.unregister_class(SortVertexGroupsOperator)
     bpy.utils.unregister_class(InOneButtonOperator)
@@ -0,0 +1,193 @@
+# vertex_group_data/vertex_group_data.py
+import re
+import time
+from itertools import chain
+import bmesh
+import numpy as np
+from ..mesh_data.mesh_data import read_co
+
+THROUGHPUT_TARGET = 2_000_000  # 每秒读写的权重项数
+
+def open_bmesh(obj):
+    """返回 (bm, 是否编辑模式)。编辑模式下直接使用编辑网格，否则从网格数据新建"""
+    if obj.mode == 'EDIT':
+        return bmesh.from_edit_mesh(obj.data), True
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    return bm, False
+
+def close_bmesh(obj, bm, edit_mode, write=False):
+    """写入时刷新编辑网格，物体模式下写回网格数据；物体模式的 bmesh 随后释放"""
+    if edit_mode:
+        if write:
+            bmesh.update_edit_mesh(obj.data)
+        return
+    if write:
+        bm.to_mesh(obj.data)
+    bm.free()
+
+def read_vertex_weights(obj):
+    """
+    经 bmesh 变形层一次读取网格的全部顶点组权重，返回 CSR 数组 (indptr, groups, weights)。
+    变形层中残留的已删除顶点组索引（>= 顶点组数量）被丢弃。
+    """
+    bm, edit_mode = open_bmesh(obj)
+    try:
+        count = len(bm.verts)
+        layer = bm.verts.layers.deform.active
+        if layer is None:
+            return np.zeros(count + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        items = [v[layer].items() for v in bm.verts]
+    finally:
+        close_bmesh(obj, bm, edit_mode)
+    counts = np.fromiter(map(len, items), dtype=np.int64, count=count)
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+    flat = np.fromiter(chain.from_iterable(chain.from_iterable(items)), dtype=np.float64, count=int(indptr[-1]) * 2)
+    groups, weights = flat[0::2].astype(np.int32), flat[1::2].astype(np.float32)
+    valid = groups < len(obj.vertex_groups)
+    if not valid.all():
+        counts = np.bincount(csr_rows(indptr)[valid], minlength=count)
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        groups, weights = groups[valid], weights[valid]
+    return indptr, groups, weights
+
+def write_vertex_weights(obj, csr, replace=None):
+    """
+    把 CSR 权重（组索引为 obj 的顶点组索引）经 bmesh 变形层批量写回网格。
+    replace 中的组先在所有顶点上清空，None 表示清空 CSR 中出现的组；其余组的权重保持不变。
+    物体模式下 to_mesh 会改写形态键层，写入前后用 foreach_get/foreach_set 保存并恢复全部形态键与顶点坐标。
+    """
+    replace = set(np.unique(csr[1]).tolist() if replace is None else replace)
+    mesh = obj.data
+    if obj.mode == 'EDIT':
+        write_deform_layer(obj, csr, replace)
+        return
+    saved = [read_co(data, len(mesh.vertices)) for data in coordinate_layers(mesh)]
+    write_deform_layer(obj, csr, replace)
+    for data, co in zip(coordinate_layers(mesh), saved):
+        data.foreach_set("co", co.ravel())
+    mesh.update()
+
+def coordinate_layers(mesh):
+    """顶点坐标与全部形态键坐标的集合，to_mesh 之后需要重新获取"""
+    return [mesh.vertices] + ([kb.data for kb in mesh.shape_keys.key_blocks] if mesh.shape_keys else [])
+
+def write_deform_layer(obj, csr, replace):
+    """逐顶点写入 bmesh 变形层：编辑模式下直接写入编辑网格，物体模式下写回网格数据"""
+    indptr, groups, weights = csr
+    bm, edit_mode = open_bmesh(obj)
+    try:
+        layer = bm.verts.layers.deform.verify()
+        bounds = indptr.tolist()
+        group_list = groups.tolist()
+        weight_list = weights.tolist()
+        for i, v in enumerate(bm.verts):
+            dv = v[layer]
+            for g in replace.intersection(dv.keys()):
+                del dv[g]
+            for k in range(bounds[i], bounds[i + 1]):
+                dv[group_list[k]] = weight_list[k]
+    finally:
+        close_bmesh(obj, bm, edit_mode, write=True)
+
+def csr_rows(indptr):
+    """CSR 每个非零项所在的顶点索引"""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+def csr_from_entries(count, rows, groups, weights):
+    """由无序的 (顶点, 组, 权重) 三元组构建 CSR 数组"""
+    order = np.lexsort((groups, rows))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=count))))
+    return indptr, np.asarray(groups, dtype=np.int32)[order], np.asarray(weights, dtype=np.float32)[order]
+
+def group_weights(csr, group_index):
+    """从 CSR 数组取出单个顶点组的稠密权重向量"""
+    indptr, groups, weights = csr
+    dense = np.zeros(len(indptr) - 1, dtype=np.float32)
+    mask = groups == group_index
+    dense[csr_rows(indptr)[mask]] = weights[mask]
+    return dense
+
+def dense_weights(csr, group_indices):
+    """一次把 CSR 中多个顶点组展开为稠密矩阵 (V, len(group_indices))，列顺序与 group_indices 相同"""
+    indptr, groups, weights = csr
+    group_indices = np.asarray(group_indices, dtype=np.int64)
+    dense = np.zeros((len(indptr) - 1, len(group_indices)), dtype=np.float32)
+    if not len(group_indices) or not len(groups):
+        return dense
+    column = np.full(max(int(groups.max()), int(group_indices.max())) + 1, -1, dtype=np.int64)
+    column[group_indices] = np.arange(len(group_indices))
+    columns = column[groups]
+    mask = columns >= 0
+    dense[csr_rows(indptr)[mask], columns[mask]] = weights[mask]
+    return dense
+
+def dense_to_csr(dense, group_indices, threshold=0.0):
+    """把稠密矩阵 (V, N) 中大于 threshold 的权重转为 CSR，第 j 列写入组 group_indices[j]"""
+    rows, columns = np.nonzero(dense > threshold)
+    return csr_from_entries(len(dense), rows, np.asarray(group_indices, dtype=np.int32)[columns], dense[rows, columns])
+
+def natural_key(name):
+    return [int(text) if text.isdigit() else text for text in re.split(r'(\d+)', name)]
+
+def natural_order(obj):
+    """按名称中的数字大小排序的顶点组名称列表"""
+    return sorted([vg.name for vg in obj.vertex_groups], key=natural_key)
+
+def bone_order(obj):
+    """绑定骨架的骨骼顺序，没有骨架时返回空列表"""
+    armature = obj.find_armature()
+    return [bone.name for bone in armature.data.bones] if armature else []
+
+def read_name_list(filepath):
+    """读取每行一个名称的文本文件，忽略空行与首尾空白"""
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+def reorder_vertex_groups(obj, order):
+    """
+    按名称列表一次性重建顶点组顺序：order 中存在的组依次排在前面，其余组保持原有相对顺序。
+    只重建第一个位置发生变化之后的顶点组，权重原样写回，返回重建数量。
+    """
+    vertex_groups = obj.vertex_groups
+    current = [vg.name for vg in vertex_groups]
+    target = []
+    for name in order:
+        if name in vertex_groups and name not in target:
+            target.append(name)
+    placed = set(target)
+    target += [name for name in current if name not in placed]
+    first = next((i for i, (a, b) in enumerate(zip(current, target)) if a != b), None)
+    if first is None:
+        return 0
+    indptr, groups, weights = read_vertex_weights(obj)
+    locks = {vg.name: vg.lock_weight for vg in vertex_groups}
+    active_name = vertex_groups.active.name if vertex_groups.active else None
+    for vg in reversed(vertex_groups[first:]):
+        vertex_groups.remove(vg)
+    old_index = {name: i for i, name in enumerate(current)}
+    remap = np.arange(len(current))
+    for name in target[first:]:
+        vg = vertex_groups.new(name=name)
+        vg.lock_weight = locks[name]
+        remap[old_index[name]] = vg.index
+    moved = groups >= first
+    rows = csr_rows(indptr)[moved]
+    write_vertex_weights(obj, csr_from_entries(len(indptr) - 1, rows, remap[groups[moved]], weights[moved]))
+    if active_name:
+        vertex_groups.active_index = vertex_groups.find(active_name)
+    return len(target) - first
+
+def benchmark_vertex_weights(obj, repeat=3):
+    """测量读写吞吐（权重项/秒），写入的是刚读出的同一份数据，不改变网格。返回 (读, 写, 权重项数)"""
+    read_time = write_time = 0.0
+    csr = read_vertex_weights(obj)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        csr = read_vertex_weights(obj)
+        read_time += time.perf_counter() - start
+        start = time.perf_counter()
+        write_vertex_weights(obj, csr)
+        write_time += time.perf_counter() - start
+    entries = len(csr[1]) * repeat
+    return entries / max(read_time, 1e-9), entries / max(write_time, 1e-9), len(csr[1])
@@ -1,15 +1,191 @@
 # vertex_group_snapshot/vertex_group_snapshot.py
 import bpy
 import json
+import time
+import zlib
+import base64
+import struct
+import uuid
+import numpy as np
 from datetime import datetime
-from bpy.props import StringProperty, IntProperty, CollectionProperty
+from bpy.app.handlers import persistent
+from bpy.props import StringProperty, IntProperty, BoolProperty, CollectionProperty
 from bpy.types import PropertyGroup, Operator, Panel, AddonPreferences
+from ..vertex_group_data.vertex_group_data import read_vertex_weights, write_vertex_weights, csr_rows, csr_from_entries
+
+SNAPSHOT_FORMAT_JSON = 1
+SNAPSHOT_FORMAT_PACKED = 2
+PACKED_HEADER = struct.Struct("<4sIII")
+PACKED_MAGIC = b"VGS2"
+KEYFRAME_INTERVAL = 8  # 增量链上每隔多少个快照存一次完整快照
 
 # Properties
 class VertexGroupSnapshot(PropertyGroup):
     name: StringProperty(name="Snapshot Name")
     data: StringProperty(name="Snapshot Data")
     index: IntProperty()
+    format_version: IntProperty(default=SNAPSHOT_FORMAT_JSON)
+    uid: StringProperty()
+    parent: StringProperty()  # 增量快照的父快照 uid，为空表示完整快照（关键帧）
+
+# Storage
+def pack_snapshot(names, csr):
+    """
+    把顶点组名称与 CSR 权重（只含非零项）打包为 zlib 压缩、base64 编码的字符串：
+    头部 (魔数, 顶点数, 权重项数, 名称字节数)，随后依次为名称、每顶点项数、组索引、权重。
+    """
+    indptr, groups, weights = csr
+    names_blob = "\0".join(names).encode("utf-8")
+    payload = b"".join((
+        PACKED_HEADER.pack(PACKED_MAGIC, len(indptr) - 1, len(groups), len(names_blob)),
+        names_blob,
+        np.diff(indptr).astype("<i4").tobytes(),
+        groups.astype("<i4").tobytes(),
+        weights.astype("<f4").tobytes(),
+    ))
+    return base64.b64encode(zlib.compress(payload)).decode("ascii")
+
+def unpack_snapshot(data):
+    """pack_snapshot 的逆过程，返回 (名称列表, CSR 数组)"""
+    payload = zlib.decompress(base64.b64decode(data))
+    magic, vertex_count, entry_count, names_len = PACKED_HEADER.unpack_from(payload)
+    if magic != PACKED_MAGIC:
+        raise ValueError("unknown snapshot format")
+    offset = PACKED_HEADER.size
+    names_blob = payload[offset:offset + names_len]
+    names = names_blob.decode("utf-8").split("\0") if names_len else []
+    offset += names_len
+    counts = np.frombuffer(payload, dtype="<i4", count=vertex_count, offset=offset)
+    offset += vertex_count * 4
+    groups = np.frombuffer(payload, dtype="<i4", count=entry_count, offset=offset).astype(np.int32)
+    offset += entry_count * 4
+    weights = np.frombuffer(payload, dtype="<f4", count=entry_count, offset=offset).astype(np.float32)
+    indptr = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+    return names, (indptr, groups, weights)
+
+def json_to_csr(data, vertex_count):
+    """旧版 JSON 快照 {组名: {顶点索引: 权重}} 转为 (名称列表, CSR 数组)，丢弃零权重"""
+    names = list(data)
+    rows, groups, weights = [], [], []
+    for group, name in enumerate(names):
+        for v_index, weight in data[name].items():
+            if float(weight) > 0 and int(v_index) < vertex_count:
+                rows.append(int(v_index))
+                groups.append(group)
+                weights.append(float(weight))
+    return names, csr_from_entries(vertex_count, np.array(rows, dtype=np.int64), np.array(groups, dtype=np.int32), np.array(weights, dtype=np.float32))
+
+def read_snapshot(snapshot, vertex_count):
+    if snapshot.format_version == SNAPSHOT_FORMAT_JSON:
+        return json_to_csr(json.loads(snapshot.data), vertex_count)
+    return unpack_snapshot(snapshot.data)
+
+# Delta chains
+def entry_keys(names, state):
+    """把状态中的权重项映射为 顶点 × len(names) + 组 的键（按 names 中的名称对齐，不在其中的组丢弃），返回排序后的 (键, 权重)"""
+    state_names, (indptr, groups, weights) = state
+    position = {name: i for i, name in enumerate(names)}
+    remap = np.array([position.get(name, -1) for name in state_names] + [-1], dtype=np.int64)
+    columns = remap[groups]
+    keep = columns >= 0
+    keys = csr_rows(indptr)[keep] * max(len(names), 1) + columns[keep]
+    order = np.argsort(keys, kind='stable')
+    return keys[order], weights[keep][order]
+
+def keys_to_csr(names, vertex_count, keys, weights):
+    width = max(len(names), 1)
+    return csr_from_entries(vertex_count, keys // width, keys % width, weights)
+
+def diff_states(parent_state, state):
+    """state 相对 parent_state 变化的权重项（按 state 的组名称），被移除的项权重记为 0"""
+    names, csr = state
+    vertex_count = len(csr[0]) - 1
+    keys, weights = entry_keys(names, state)
+    parent_keys, parent_weights = entry_keys(names, parent_state)
+    position = np.clip(np.searchsorted(parent_keys, keys), 0, max(len(parent_keys) - 1, 0))
+    found = parent_keys[position] == keys if len(parent_keys) else np.zeros(len(keys), dtype=bool)
+    changed = ~found | (parent_weights[position] != weights) if len(parent_keys) else np.ones(len(keys), dtype=bool)
+    removed = parent_keys[~np.isin(parent_keys, keys)]
+    delta_keys = np.concatenate((keys[changed], removed))
+    delta_weights = np.concatenate((weights[changed], np.zeros(len(removed), dtype=np.float32)))
+    return keys_to_csr(names, vertex_count, delta_keys, delta_weights)
+
+def apply_delta(parent_state, names, delta):
+    """在 parent_state 上重放增量，返回按 names 排列的完整状态"""
+    vertex_count = len(delta[0]) - 1
+    keys, weights = entry_keys(names, parent_state)
+    delta_keys, delta_weights = entry_keys(names, (names, delta))
+    keep = ~np.isin(keys, delta_keys)
+    added = delta_weights > 0
+    return names, keys_to_csr(names, vertex_count, np.concatenate((keys[keep], delta_keys[added])), np.concatenate((weights[keep], delta_weights[added])))
+
+def find_snapshot(snapshots, uid):
+    return next((s for s in snapshots if uid and s.uid == uid), None)
+
+def snapshot_chain(snapshots, snapshot):
+    """从最近的完整快照到 snapshot 的增量链（含两端）"""
+    chain = [snapshot]
+    while chain[-1].parent:
+        parent = find_snapshot(snapshots, chain[-1].parent)
+        if parent is None or parent in chain:
+            raise ValueError(f"snapshot chain of {snapshot.name} is broken")
+        chain.append(parent)
+    return chain[::-1]
+
+def snapshot_state(snapshots, snapshot, vertex_count):
+    """重放增量链，返回 snapshot 记录的完整状态 (名称列表, CSR 数组)"""
+    chain = snapshot_chain(snapshots, snapshot)
+    state = read_snapshot(chain[0], vertex_count)
+    for link in chain[1:]:
+        names, delta = unpack_snapshot(link.data)
+        state = apply_delta(state, names, delta)
+    return state
+
+def store_snapshot(snapshots, snapshot, state, parent=None, vertex_count=0):
+    """把完整状态写入 snapshot：给出 parent 时存为相对它的增量，否则存为完整快照"""
+    names, csr = state
+    if parent is None:
+        snapshot.data = pack_snapshot(names, csr)
+        snapshot.parent = ""
+    else:
+        if not parent.uid:
+            parent.uid = uuid.uuid4().hex
+        snapshot.data = pack_snapshot(names, diff_states(snapshot_state(snapshots, parent, vertex_count), state))
+        snapshot.parent = parent.uid
+    snapshot.format_version = SNAPSHOT_FORMAT_PACKED
+
+def rebase_children(snapshots, snapshot, vertex_count):
+    """删除 snapshot 前把以它为父的增量快照改为相对它的父快照（它是完整快照时子快照改存完整状态）"""
+    if not snapshot.uid:
+        return
+    children = [s for s in snapshots if s.parent == snapshot.uid]
+    states = [snapshot_state(snapshots, child, vertex_count) for child in children]
+    parent = find_snapshot(snapshots, snapshot.parent)
+    for child, state in zip(children, states):
+        store_snapshot(snapshots, child, state, parent, vertex_count)
+
+def migrate_snapshots(obj):
+    """把物体上的旧版 JSON 快照就地转换为打包格式，返回转换数量"""
+    migrated = 0
+    for snapshot in obj.vertex_group_snapshots:
+        if snapshot.format_version != SNAPSHOT_FORMAT_JSON:
+            continue
+        try:
+            names, csr = json_to_csr(json.loads(snapshot.data), len(obj.data.vertices))
+        except (ValueError, AttributeError):
+            continue
+        snapshot.data = pack_snapshot(names, csr)
+        snapshot.format_version = SNAPSHOT_FORMAT_PACKED
+        migrated += 1
+    return migrated
+
+@persistent
+def migrate_snapshots_on_load(dummy):
+    for obj in bpy.data.objects:
+        if obj.type == 'MESH' and obj.library is None and len(obj.vertex_group_snapshots):
+            migrated = migrate_snapshots(obj)
+            if migrated:
+                print(f"已将 {obj.name} 的 {migrated} 个 JSON 快照转换为打包格式")
 
 # Operators
 class VGS_OT_CreateSnapshot(Operator):
@@ -32,25 +208,25 @@ class VGS_OT_CreateSnapshot(Operator):
             final_name = f"{base_name}_{index:02d}"
             index += 1
 
-        # 收集数据
-        snapshot_data = {}
-        for vg in obj.vertex_groups:
-            group_data = {}
-            for v in obj.data.vertices:
-                try:
-                    weight = vg.weight(v.index)
-                except RuntimeError:
-                    weight = 0
-                group_data[str(v.index)] = weight
-            snapshot_data[vg.name] = group_data
-
-        # 创建快照
+        # 收集数据：一次读取全部权重，只记录非零项
+        start_time = time.perf_counter()
+        indptr, groups, weights = read_vertex_weights(obj)
+        keep = weights > 0
+        csr = csr_from_entries(len(indptr) - 1, csr_rows(indptr)[keep], groups[keep], weights[keep])
+
+        # 创建快照：增量模式下相对最新快照只存变化项，链长达到 KEYFRAME_INTERVAL 时存完整快照
+        parent = None
+        if obj.vertex_group_snapshot_incremental and len(snapshots):
+            parent = snapshots[len(snapshots) - 1]
+            if len(snapshot_chain(snapshots, parent)) >= KEYFRAME_INTERVAL:
+                parent = None
         snapshot = snapshots.add()
         snapshot.name = final_name
-        snapshot.data = json.dumps(snapshot_data)
+        snapshot.uid = uuid.uuid4().hex
+        store_snapshot(snapshots, snapshot, ([vg.name for vg in obj.vertex_groups], csr), parent, len(indptr) - 1)
         obj.active_snapshot_index = len(snapshots) - 1
         
-        self.report({'INFO'}, f"快照 {snapshot.name} 已创建")
+        self.report({'INFO'}, f"快照 {snapshot.name} 已创建（{len(csr[1])} 个权重，{len(snapshot.data) / 1024:.1f} KB，{time.perf_counter() - start_time:.2f}s）")
         return {'FINISHED'}
 
 class VGS_OT_ApplySnapshot(Operator):
@@ -71,24 +247,22 @@ class VGS_OT_ApplySnapshot(Operator):
         
         try:
             snapshot = snapshots[obj.active_snapshot_index]
-            data = json.loads(snapshot.data)
-        except (IndexError, KeyError):
+            names, (indptr, groups, weights) = snapshot_state(snapshots, snapshot, len(obj.data.vertices))
+        except (IndexError, KeyError, ValueError, zlib.error):
             self.report({'ERROR'}, "无效的快照")
             return {'CANCELLED'}
+        if len(indptr) - 1 != len(obj.data.vertices):
+            self.report({'ERROR'}, "快照的顶点数与网格不一致")
+            return {'CANCELLED'}
 
-        # 清除旧顶点组
-        for vg in obj.vertex_groups:
-            obj.vertex_groups.remove(vg)
-
-        # 重建顶点组
-        for vg_name in data:
-            new_vg = obj.vertex_groups.new(name=vg_name)
-            group_data = data[vg_name]
-            for v_index, weight in group_data.items():
-                if float(weight) > 0:
-                    new_vg.add([int(v_index)], float(weight), 'REPLACE')
+        # 清除旧顶点组，按快照顺序重建后一次写入全部权重（组索引与快照中的顺序一致）
+        start_time = time.perf_counter()
+        obj.vertex_groups.clear()
+        for vg_name in names:
+            obj.vertex_groups.new(name=vg_name)
+        write_vertex_weights(obj, (indptr, groups, weights))
 
-        self.report({'INFO'}, f"已应用快照: {snapshot.name}")
+        self.report({'INFO'}, f"已应用快照: {snapshot.name}（{time.perf_counter() - start_time:.2f}s）")
         return {'FINISHED'}
 
 class VGS_OT_DeleteSnapshot(Operator):
@@ -109,6 +283,11 @@ class VGS_OT_DeleteSnapshot(Operator):
             self.report({'ERROR'}, "无效的索引")
             return {'CANCELLED'}
         
+        try:
+            rebase_children(snapshots, snapshots[index], len(obj.data.vertices))
+        except (ValueError, zlib.error):
+            self.report({'ERROR'}, "快照链已损坏，无法重建子快照")
+            return {'CANCELLED'}
         snapshots.remove(index)
         obj.active_snapshot_index = min(index, len(snapshots)-1)
         self.report({'INFO'}, "快照已删除")
@@ -124,7 +303,9 @@ def draw_panel(layout, context):
     snapshots = obj.vertex_group_snapshots
 
     # 创建按钮
-    layout.operator("vgs.create_snapshot", icon='FILE_NEW')
+    row = layout.row(align=True)
+    row.operator("vgs.create_snapshot", icon='FILE_NEW')
+    row.prop(obj, "vertex_group_snapshot_incremental", text="增量")
 
     # 快照列表
     if snapshots:
@@ -155,14 +336,23 @@ def register():
         name="Active Snapshot Index",
         default=0
     )
+    bpy.types.Object.vertex_group_snapshot_incremental = BoolProperty(
+        name="Incremental Snapshots",
+        description="Store only the weights that changed since the previous snapshot",
+        default=False
+    )
     bpy.utils.register_class(VGS_OT_CreateSnapshot)
     bpy.utils.register_class(VGS_OT_ApplySnapshot)
     bpy.utils.register_class(VGS_OT_DeleteSnapshot)
+    bpy.app.handlers.load_post.append(migrate_snapshots_on_load)
 
 def unregister():
+    if migrate_snapshots_on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(migrate_snapshots_on_load)
     bpy.utils.unregister_class(VertexGroupSnapshot)
     del bpy.types.Object.vertex_group_snapshots
     del bpy.types.Object.active_snapshot_index
+    del bpy.types.Object.vertex_group_snapshot_incremental
     bpy.utils.unregister_class(VGS_OT_CreateSnapshot)
     bpy.utils.unregister_class(VGS_OT_ApplySnapshot)
     bpy.utils.unregister_class(VGS_OT_DeleteSnapshot)
\ No newline at end of file
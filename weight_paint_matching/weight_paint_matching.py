@@ -8,10 +8,36 @@ bl_info = {
 }
 
 import bpy
+import blf
 import re
-from bpy.props import PointerProperty, StringProperty, EnumProperty
-from bpy.types import Object, Operator
+import time
+import hashlib
+from bpy.props import PointerProperty, StringProperty, EnumProperty, FloatProperty, BoolProperty, IntProperty
+from bpy.types import Object, Operator, Collection
+import numpy as np
 from mathutils import Vector
+from mathutils.kdtree import KDTree
+from bpy_extras import view3d_utils
+from ..vertex_group_data.vertex_group_data import read_vertex_weights, write_vertex_weights, csr_rows, dense_weights, dense_to_csr, natural_order, bone_order, reorder_vertex_groups, read_name_list
+from ..mesh_data.mesh_data import build_surface_correspondence, interpolate, mesh_triangles, object_correspondence
+
+CENTROID_CACHE_PROP = "zmtb_centroid_cache"
+AMBIGUITY_RATIO = 1.1
+EXACT_POSITION_TOLERANCE = 1e-4  # 相对网格尺寸的顶点位置容差
+EXACT_WEIGHT_TOLERANCE = 0.004  # 覆盖 8 位权重的量化误差
+EXACT_MIN_MATCHED = 0.5  # 权重匹配上的组占比低于该值时全部走中心匹配
+SMOOTH_CHUNK = 32  # 每次平滑的顶点组列数，限制邻接展开的内存
+SMOOTH_THRESHOLD = 1e-5
+MIRROR_MAP_CACHE = {}
+MIRROR_NAME_PATTERNS = [
+    (r'\.L$', '.R'), (r'\.R$', '.L'),
+    (r'_L$', '_R'), (r'_R$', '_L'),
+    (r'\.l$', '.r'), (r'\.r$', '.l'),
+    (r'_l$', '_r'), (r'_r$', '_l'),
+    (r'^L_', 'R_'), (r'^R_', 'L_'),
+    (r'Left', 'Right'), (r'Right', 'Left'),
+    (r'left', 'right'), (r'right', 'left'),
+]
 
 class WeightPaintMatchingOperator(bpy.types.Operator):
     bl_idname = "sk_tools.weight_paint_matching"
@@ -21,49 +47,425 @@ class WeightPaintMatchingOperator(bpy.types.Operator):
         base_obj = context.scene.weight_paint_matching_base
         target_obj = context.scene.weight_paint_matching_target
         if base_obj and target_obj:
-            match_vertex_groups(base_obj, target_obj)
-            self.report({'INFO'}, "Vertex groups matched.")
+            scene = context.scene
+            report_matching(self, match_vertex_groups(base_obj, target_obj, scene.weight_paint_matching_mode, scene.weight_paint_matching_max_distance))
         else:
             self.report({'ERROR'}, "One or more objects not found.")
         return {'FINISHED'}
 
-def get_weighted_center(obj, vgroup):
-    total_weight_area = 0.0
-    weighted_position_sum = Vector((0.0, 0.0, 0.0))
-    vertex_influence_area = calculate_vertex_influence_area(obj)
-    for vertex in obj.data.vertices:
-        weight = get_vertex_group_weight(vgroup, vertex)
-        influence_area = vertex_influence_area[vertex.index]
-        weight_area = weight * influence_area
-        if weight_area > 0:
-            weighted_position_sum += obj.matrix_world @ vertex.co * weight_area
-            total_weight_area += weight_area
-    return weighted_position_sum / total_weight_area if total_weight_area > 0 else None
+def report_matching(operator, report):
+    """在控制台逐行打印匹配结果，并在状态栏汇总匹配数与平均距离"""
+    distances = [dist for old, new, dist, ambiguous in report if new is not None]
+    for old, new, dist, ambiguous in report:
+        print(f"{old} -> {new} ({dist:.5f}){' ?' if ambiguous else ''}" if new is not None else f"{old} -> unknown")
+    mean = sum(distances) / len(distances) if distances else 0.0
+    operator.report({'INFO'}, f"Vertex groups matched: {len(distances)}, unknown: {len(report) - len(distances)}, mean distance {mean:.5f}.")
+
+class WeightPaintMatchingPreviewOperator(bpy.types.Operator):
+    """
+    实时预览匹配结果：同一网格的权重匹配、物体空间中心与目标中心只在开始时计算一次，
+    移动或缩放基体时只重新应用 matrix_world 并重新分配剩余组，在视图中标注每个基体组的候选名称与距离。
+    Enter 直接按当前预览的分配重命名，Esc / 右键退出；基体被删除或顶点组改变时自动退出。
+    """
+    bl_idname = "sk_tools.weight_paint_matching_preview"
+    bl_label = "Preview Weight Paint Matching"
+    bl_options = {'REGISTER', 'UNDO'}
+    _timer = None
+    _handle = None
+    def invoke(self, context, event):
+        scene = context.scene
+        base_obj = scene.weight_paint_matching_base
+        target_obj = scene.weight_paint_matching_target
+        if not base_obj or not target_obj or context.area.type != 'VIEW_3D':
+            self.report({'ERROR'}, "One or more objects not found, or not in a 3D viewport.")
+            return {'CANCELLED'}
+        self.base_obj = base_obj
+        self.exact = exact_matching(base_obj, target_obj)
+        self.local_centers = get_group_centroids(base_obj)[0]
+        self.target_centers, self.target_names = reference_centroids([target_obj])
+        self.base_names = [g.name for g in base_obj.vertex_groups]
+        self.matrix = None
+        self.assignment = {}
+        self.labels = []
+        self.update_preview(context)
+        self._timer = context.window_manager.event_timer_add(0.05, window=context.window)
+        self._handle = bpy.types.SpaceView3D.draw_handler_add(self.draw_labels, (context,), 'WINDOW', 'POST_PIXEL')
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+    def base_valid(self):
+        """基体物体仍然存在且顶点组未增删"""
+        try:
+            return [g.name for g in self.base_obj.vertex_groups] == self.base_names
+        except ReferenceError:
+            return False
+    def update_preview(self, context):
+        matrix = tuple(tuple(row) for row in self.base_obj.matrix_world)
+        if matrix == self.matrix:
+            return False
+        self.matrix = matrix
+        scene = context.scene
+        centers = to_world(self.base_obj, self.local_centers)
+        self.assignment = complete_assignment(self.exact, centers, self.target_centers, scene.weight_paint_matching_mode, scene.weight_paint_matching_max_distance)
+        self.labels = []
+        for index, name in enumerate(self.base_names):
+            if np.isnan(centers[index, 0]):
+                continue
+            match = self.assignment.get(index)
+            text = f"{name} → {self.target_names[match[0]]} ({match[1]:.4f})" if match else f"{name} → unknown"
+            self.labels.append((Vector(centers[index].tolist()), text))
+        return True
+    def draw_labels(self, context):
+        region = context.region
+        rv3d = context.region_data
+        if rv3d is None:
+            return
+        blf.size(0, 12)
+        for location, text in self.labels:
+            position = view3d_utils.location_3d_to_region_2d(region, rv3d, location)
+            if position is not None:
+                blf.position(0, position.x, position.y, 0)
+                blf.draw(0, text)
+    def modal(self, context, event):
+        if not self.base_valid():
+            self.finish(context)
+            self.report({'WARNING'}, "Base object or its vertex groups changed, preview stopped.")
+            return {'CANCELLED'}
+        if event.type == 'TIMER':
+            if self.update_preview(context):
+                context.area.tag_redraw()
+        elif event.type in {'RET', 'NUMPAD_ENTER'} and event.value == 'PRESS':
+            self.finish(context)
+            report_matching(self, rename_vertex_groups(self.base_obj, self.assignment, self.target_names))
+            return {'FINISHED'}
+        elif event.type in {'ESC', 'RIGHTMOUSE'} and event.value == 'PRESS':
+            self.finish(context)
+            return {'CANCELLED'}
+        return {'PASS_THROUGH'}
+    def cancel(self, context):
+        self.finish(context)
+    def finish(self, context):
+        """移除计时器与绘制回调，可重复调用"""
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        if self._handle is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(self._handle, 'WINDOW')
+            self._handle = None
+        if context.area:
+            context.area.tag_redraw()
+
+class WeightPaintBatchMatchingOperator(bpy.types.Operator):
+    bl_idname = "sk_tools.weight_paint_batch_matching"
+    bl_label = "Batch Match Weight Paints"
+    bl_options = {'REGISTER', 'UNDO'}
+    def execute(self, context):
+        scene = context.scene
+        collection = scene.weight_paint_matching_collection
+        if scene.weight_paint_matching_references:
+            references = [o for o in scene.weight_paint_matching_references.all_objects if o.type == 'MESH' and o.vertex_groups]
+        else:
+            references = [scene.weight_paint_matching_target] if scene.weight_paint_matching_target else []
+        if not collection or not references:
+            self.report({'ERROR'}, "Collection or reference objects not found.")
+            return {'CANCELLED'}
+        reference = reference_centroids(references)
+        rows = []
+        for obj in collection.all_objects:
+            if obj.type != 'MESH' or not obj.vertex_groups or obj in references:
+                continue
+            report = match_vertex_groups(obj, None, scene.weight_paint_matching_mode, scene.weight_paint_matching_max_distance, reference)
+            matched = sum(1 for entry in report if entry[1] is not None)
+            ambiguous = sum(1 for entry in report if entry[3])
+            rows.append((obj.name, matched, len(report) - matched, ambiguous))
+        print(f"{'Object':<32}{'Matched':>9}{'Unknown':>9}{'Ambiguous':>11}")
+        for name, matched, unknown, ambiguous in rows:
+            print(f"{name:<32}{matched:>9}{unknown:>9}{ambiguous:>11}")
+        self.report({'INFO'}, f"Matched {len(rows)} objects against {len(references)} reference(s), see console for the summary table.")
+        return {'FINISHED'}
 
 def calculate_vertex_influence_area(obj):
-    vertex_area = [0.0] * len(obj.data.vertices)
-    for face in obj.data.polygons:
-        area_per_vertex = face.area / len(face.vertices)
-        for vert_idx in face.vertices:
-            vertex_area[vert_idx] += area_per_vertex
-    return vertex_area
-
-def get_vertex_group_weight(vgroup, vertex):
-    for group in vertex.groups:
-        if group.group == vgroup.index:
-            return group.weight
-    return 0.0
-
-def match_vertex_groups(base_obj, target_obj):
+    mesh = obj.data
+    area = np.empty(len(mesh.polygons), dtype=np.float64)
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int64)
+    loop_vertex = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.polygons.foreach_get("area", area)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    mesh.loops.foreach_get("vertex_index", loop_vertex)
+    return np.bincount(loop_vertex, np.repeat(area / np.maximum(loop_total, 1), loop_total), minlength=len(mesh.vertices))
+
+def centroid_fingerprint(obj, co, csr):
+    """缓存键：全部顶点坐标、面拓扑、CSR 权重数组和顶点组名称，几何或权重任何变化都会使缓存失效"""
+    mesh = obj.data
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_vertex = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    mesh.loops.foreach_get("vertex_index", loop_vertex)
+    h = hashlib.blake2b(digest_size=16)
+    for array in (co, loop_total, loop_vertex) + tuple(csr):
+        h.update(array.tobytes())
+    h.update("\0".join(g.name for g in obj.vertex_groups).encode())
+    return h.hexdigest()
+
+def get_group_centroids(obj):
+    """
+    一次遍历计算所有顶点组的面积加权中心（物体空间）。
+    权重矩阵 W (V×G) 以 CSR 形式读取，中心 = Wᵀ(a⊙X) / Wᵀa，其中 a 为顶点影响面积。
+    结果按 centroid_fingerprint 缓存在物体自定义属性中，命中时跳过面积与中心的计算；
+    缓存为物体空间中心，matrix_world 在使用时再应用，移动物体不会使缓存失效。
+    返回 (中心 (G, 3)，加权面积 (G,))，加权面积为 0 的顶点组中心为 NaN。
+    """
+    mesh = obj.data
+    count = len(mesh.vertices)
+    n_groups = len(obj.vertex_groups)
+    co = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    csr = read_vertex_weights(obj)
+    fingerprint = centroid_fingerprint(obj, co, csr)
+    cache = obj.get(CENTROID_CACHE_PROP)
+    if cache is not None and cache.get("fingerprint") == fingerprint and len(cache["areas"]) == n_groups:
+        centers = np.array(cache["centers"], dtype=np.float64).reshape(n_groups, 3)
+        total = np.array(cache["areas"], dtype=np.float64)
+        return np.where(total[:, None] > 0, centers, np.nan), total
+    indptr, groups, weights = csr
+    rows = csr_rows(indptr)
+    weight_area = weights * calculate_vertex_influence_area(obj)[rows]
+    co = co.reshape(count, 3).astype(np.float64)
+    total = np.bincount(groups, weight_area, minlength=n_groups)
+    sums = np.stack([np.bincount(groups, weight_area * co[rows, c], minlength=n_groups) for c in range(3)], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centers = np.where(total[:, None] > 0, sums / total[:, None], np.nan)
+    try:
+        obj[CENTROID_CACHE_PROP] = {
+            "fingerprint": fingerprint,
+            "centers": np.nan_to_num(centers).ravel().tolist(),
+            "areas": total.tolist(),
+        }
+    except (AttributeError, TypeError):
+        pass  # 链接库中的物体不可写，跳过缓存
+    return centers, total
+
+def to_world(obj, centers):
+    matrix = np.array(obj.matrix_world)
+    return centers @ matrix[:3, :3].T + matrix[:3, 3]
+
+def linear_sum_assignment(cost):
+    """
+    匈牙利算法（最短增广路形式），求代价矩阵的全局最优一对一分配。
+    内层对列的更新用 numpy 向量化，返回 (行索引, 列索引)。
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            current = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (current < minv[1:])
+            minv[1:][better] = current[better]
+            way[1:][better] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            used_cols = np.flatnonzero(used)
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    cols = np.flatnonzero(p[1:])
+    rows = p[1:][cols] - 1
+    order = np.argsort(rows)
+    rows, cols = rows[order], cols[order]
+    return (cols, rows) if transposed else (rows, cols)
+
+def assign_vertex_groups(base_centers, target_centers, mode='NEAREST', max_distance=0.0):
+    """
+    为每个基体顶点组选择目标顶点组，NaN 中心的组不参与匹配。
+    NEAREST 用目标中心的 KD 树查询最近项（可多对一）；OPTIMAL 求全局最优一对一分配。
+    距离超过 max_distance（> 0 时）的组视为未匹配。
+    返回 {基体组索引: (目标组索引, 距离, 次近目标距离或 None)}。
+    """
+    base_valid = np.flatnonzero(~np.isnan(base_centers[:, 0]))
+    target_valid = np.flatnonzero(~np.isnan(target_centers[:, 0]))
+    result = {}
+    if not len(base_valid) or not len(target_valid):
+        return result
+    if mode == 'OPTIMAL':
+        distance = np.linalg.norm(base_centers[base_valid, None, :] - target_centers[None, target_valid, :], axis=2)
+        cost = distance
+        if max_distance > 0:
+            cost = np.where(distance > max_distance, distance.max() * (len(base_valid) + 1) + 1.0, distance)
+        rows, cols = linear_sum_assignment(cost)
+        runner_up = np.partition(distance, 1, axis=1)[:, 1] if len(target_valid) > 1 else np.full(len(base_valid), np.nan)
+        pairs = ((base_valid[r], target_valid[c], distance[r, c], runner_up[r]) for r, c in zip(rows, cols))
+    else:
+        tree = KDTree(len(target_valid))
+        for i, index in enumerate(target_valid):
+            tree.insert(target_centers[index], i)
+        tree.balance()
+        pairs = []
+        for index in base_valid:
+            found = tree.find_n(base_centers[index], 2)
+            co, i, dist = found[0]
+            pairs.append((index, target_valid[i], dist, found[1][2] if len(found) > 1 else np.nan))
+    for base_index, target_index, dist, second in pairs:
+        if max_distance <= 0 or dist <= max_distance:
+            result[int(base_index)] = (int(target_index), float(dist), None if np.isnan(second) else float(second))
+    return result
+
+def vertex_co(obj):
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+def face_topology(mesh):
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_vertex = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    mesh.loops.foreach_get("vertex_index", loop_vertex)
+    return loop_total, loop_vertex
+
+def exact_vertex_map(base_obj, target_obj):
+    """
+    判断两个网格是否为同一网格：每个基体顶点都要在物体空间 EXACT_POSITION_TOLERANCE（按网格尺寸缩放）内
+    找到唯一的目标顶点。拓扑相同时先按索引比较，否则用 KDTree 找最近顶点。
+    返回基体顶点 → 目标顶点的索引数组，不是同一网格时返回 None。
+    """
+    count = len(base_obj.data.vertices)
+    if not count or count != len(target_obj.data.vertices):
+        return None
+    base_co = vertex_co(base_obj)
+    target_co = vertex_co(target_obj)
+    tolerance = EXACT_POSITION_TOLERANCE * max(float(np.abs(target_co).max()), 1.0)
+    if all(np.array_equal(a, b) for a, b in zip(face_topology(base_obj.data), face_topology(target_obj.data))):
+        if np.abs(base_co - target_co).max() <= tolerance:
+            return np.arange(count)
+    tree = KDTree(count)
+    for i, point in enumerate(target_co.tolist()):
+        tree.insert(point, i)
+    tree.balance()
+    vertex_map = np.empty(count, dtype=np.int64)
+    for i, point in enumerate(base_co.tolist()):
+        found, vertex_map[i], dist = tree.find(point)
+        if dist > tolerance:
+            return None
+    if len(np.unique(vertex_map)) != count:
+        return None
+    return vertex_map
+
+def exact_assignment(base_obj, target_obj, vertex_map):
+    """
+    同一网格时按权重向量匹配顶点组：每个非空基体组取平方距离最近的目标组，
+    逐顶点最大差值在 EXACT_WEIGHT_TOLERANCE 内才算匹配（容忍 8 位量化等导出误差）。
+    格式与 assign_vertex_groups 相同，第二个目标组也在容差内时次近距离记为 0。
+    """
+    base_csr = read_vertex_weights(base_obj)
+    target_csr = read_vertex_weights(target_obj)
+    base_indices = np.unique(base_csr[1])
+    target_indices = np.unique(target_csr[1])
+    if not len(base_indices) or not len(target_indices):
+        return {}
+    base = np.zeros((len(vertex_map), len(base_indices)), dtype=np.float32)
+    base[vertex_map] = dense_weights(base_csr, base_indices)
+    target = dense_weights(target_csr, target_indices)
+    d2 = (base * base).sum(0)[:, None] + (target * target).sum(0)[None, :] - 2.0 * (base.T @ target)
+    order = np.argsort(d2, axis=1)[:, :2]
+    result = {}
+    for i, candidates in enumerate(order.tolist()):
+        within = [j for j in candidates if np.abs(base[:, i] - target[:, j]).max() <= EXACT_WEIGHT_TOLERANCE]
+        if within and within[0] == candidates[0]:
+            result[int(base_indices[i])] = (int(target_indices[within[0]]), 0.0, 0.0 if len(within) > 1 else None)
+    return result
+
+def exact_matching(base_obj, target_obj):
+    """
+    同一网格时的权重匹配结果；不是同一网格，或匹配上的组少于非空基体组的 EXACT_MIN_MATCHED 时返回空字典，
+    由中心路径处理全部顶点组。
+    """
+    vertex_map = exact_vertex_map(base_obj, target_obj)
+    if vertex_map is None:
+        return {}
+    assignment = exact_assignment(base_obj, target_obj, vertex_map)
+    non_empty = len(np.unique(read_vertex_weights(base_obj)[1]))
+    return assignment if len(assignment) >= EXACT_MIN_MATCHED * max(non_empty, 1) else {}
+
+def complete_assignment(exact, base_centers, target_centers, mode='NEAREST', max_distance=0.0):
+    """把权重匹配结果与中心匹配合并：已匹配的基体组及其目标组不参与中心匹配，其余组按 mode 分配"""
+    if exact:
+        base_centers = np.array(base_centers, dtype=np.float64)
+        target_centers = np.array(target_centers, dtype=np.float64)
+        base_centers[list(exact)] = np.nan
+        target_centers[[target_index for target_index, dist, second in exact.values()]] = np.nan
+    assignment = assign_vertex_groups(base_centers, target_centers, mode, max_distance)
+    assignment.update(exact)
+    return assignment
+
+def reference_centroids(objects):
+    """合并一个或多个参考物体的世界空间顶点组中心，返回 (中心 (G, 3), 名称列表)"""
+    centers = [np.zeros((0, 3))]
+    names = []
+    for obj in objects:
+        centers.append(to_world(obj, get_group_centroids(obj)[0]))
+        names += [g.name for g in obj.vertex_groups]
+    return np.concatenate(centers), names
+
+def plan_vertex_group_matching(base_obj, target_obj, mode='NEAREST', max_distance=0.0, reference=None):
+    """
+    计算基体顶点组到目标名称的分配，不修改物体。reference 为预先计算的 reference_centroids 结果（可省略 target_obj）。
+    基体与目标为同一网格时先按权重向量匹配，剩余组（匹配过少时为全部组）再按中心分配。返回 (分配, 目标名称列表)。
+    """
+    exact = exact_matching(base_obj, target_obj) if reference is None else {}
+    target_centers, target_names = reference if reference is not None else reference_centroids([target_obj])
+    base_centers = to_world(base_obj, get_group_centroids(base_obj)[0])
+    return complete_assignment(exact, base_centers, target_centers, mode, max_distance), target_names
+
+def rename_vertex_groups(base_obj, assignment, target_names):
+    """
+    按分配重命名基体顶点组，未分配的组命名为 "unknown"。
+    返回 [(原名称, 新名称或 None, 距离, 是否有歧义)]：次近目标距离在最近距离的 AMBIGUITY_RATIO 倍以内，
+    或同一目标名称被多个基体组选中时视为有歧义。
+    """
+    claims = {}
+    for target_index, dist, second in assignment.values():
+        claims[target_index] = claims.get(target_index, 0) + 1
+    report = []
+    old_names = [g.name for g in base_obj.vertex_groups]
     for base_group in base_obj.vertex_groups:
         base_group.name = "unknown"
-    target_centers = {target_group.name: get_weighted_center(target_obj, target_group) for target_group in target_obj.vertex_groups}
     for base_group in base_obj.vertex_groups:
-        base_center = get_weighted_center(base_obj, base_group)
-        if base_center:
-            best_match = min(target_centers.items(), key=lambda x: (base_center - x[1]).length if x[1] else float('inf'), default=None)
-            if best_match:
-                base_group.name = best_match[0]
+        match = assignment.get(base_group.index)
+        if match:
+            target_index, dist, second = match
+            base_group.name = target_names[target_index]
+            ambiguous = claims[target_index] > 1 or (second is not None and second <= dist * AMBIGUITY_RATIO)
+            report.append((old_names[base_group.index], target_names[target_index], dist, ambiguous))
+        else:
+            report.append((old_names[base_group.index], None, None, False))
+    return report
+
+def match_vertex_groups(base_obj, target_obj, mode='NEAREST', max_distance=0.0, reference=None):
+    """按 plan_vertex_group_matching 的分配重命名基体顶点组，返回 rename_vertex_groups 的报告"""
+    assignment, target_names = plan_vertex_group_matching(base_obj, target_obj, mode, max_distance, reference)
+    return rename_vertex_groups(base_obj, assignment, target_names)
+
 
 class RenameUnknownVertexGroupsOperator(bpy.types.Operator):
     bl_idname = "sk_tools.renumber_unknown_vertex_groups"
@@ -86,35 +488,95 @@ class SortVertexGroupsOperator(bpy.types.Operator):
     bl_idname = "sk_tools.sort_vertex_groups"
     bl_label = "Sort Vertex Groups"
     bl_options = {'REGISTER', 'UNDO'}
+    mode: EnumProperty(name="Order", items=[('NATURAL', "Natural", "Numeric-aware name order"), ('FILE', "File", "Names listed one per line in a text file"), ('BONES', "Bones", "Bone order of the bound armature")], default='NATURAL')  # type: ignore
+    filepath: StringProperty(subtype="FILE_PATH")  # type: ignore
+    filter_glob: StringProperty(default="*.txt", options={'HIDDEN'})  # type: ignore
     def execute(self, context):
         obj = context.object
-        if obj and obj.type == 'MESH':
-            bpy.context.view_layer.objects.active = obj
-            sort_vertex_groups(obj)
-            self.report({'INFO'}, "Vertex groups sorted numerically.")
-        else:
+        if not obj or obj.type != 'MESH':
             self.report({'ERROR'}, "No mesh object selected.")
+            return {'CANCELLED'}
+        if self.mode == 'FILE':
+            try:
+                order = read_name_list(self.filepath)
+            except Exception as e:
+                self.report({'ERROR'}, f"Failed to load file: {str(e)}")
+                return {'CANCELLED'}
+        elif self.mode == 'BONES':
+            order = bone_order(obj)
+            if not order:
+                self.report({'ERROR'}, "No armature bound to the object.")
+                return {'CANCELLED'}
+        else:
+            order = natural_order(obj)
+        moved = reorder_vertex_groups(obj, order)
+        self.report({'INFO'}, f"Reordered {moved} vertex group(s).")
         return {'FINISHED'}
+    def invoke(self, context, event):
+        if self.mode == 'FILE':
+            context.window_manager.fileselect_add(self)
+            return {'RUNNING_MODAL'}
+        return self.execute(context)
 
-def sort_vertex_groups(obj):
-    sorted_group_names = sorted([g.name for g in obj.vertex_groups], key=numeric_key)
-    for correct_idx, group_name in enumerate(sorted_group_names):
-        set_active_vertex_group(obj, group_name)
-        current_idx = obj.vertex_groups.find(group_name)
-        while current_idx < correct_idx:
-            bpy.ops.object.vertex_group_move(direction='DOWN')
-            current_idx += 1
-        while current_idx > correct_idx:
-            bpy.ops.object.vertex_group_move(direction='UP')
-            current_idx -= 1
-
-def set_active_vertex_group(obj, group_name):
-    group_index = obj.vertex_groups.find(group_name)
-    if group_index != -1:
-        obj.vertex_groups.active_index = group_index
-
-def numeric_key(s):
-    return [int(text) if text.isdigit() else text for text in re.split('(\d+)', s)]
+def mirror_group_name(name):
+    """返回左右对称的顶点组名称，无法识别左右时返回 None"""
+    for pattern, replacement in MIRROR_NAME_PATTERNS:
+        if re.search(pattern, name):
+            return re.sub(pattern, replacement, name)
+    return None
+
+def mirror_map(obj, axis, tolerance=1e-4):
+    """
+    物体空间中沿 axis 镜像的顶点映射。能在 tolerance 内找到镜像顶点的直接取其索引，
+    非对称拓扑的其余顶点回退到镜像位置在网格表面的重心插值。按几何与轴缓存。
+    返回 (镜像顶点索引 (V,), 精确匹配掩码 (V,), 非精确顶点的表面对应关系或 None)。
+    """
+    mesh = obj.data
+    count = len(mesh.vertices)
+    co = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(count, 3)
+    tris = mesh_triangles(mesh)
+    cache_key = (hashlib.blake2b(co.tobytes() + tris.tobytes(), digest_size=16).digest(), axis, tolerance)
+    if cache_key in MIRROR_MAP_CACHE:
+        return MIRROR_MAP_CACHE[cache_key]
+    mirrored = co.astype(np.float64)
+    mirrored[:, "XYZ".index(axis)] *= -1.0
+    tree = KDTree(count)
+    for i, point in enumerate(co.tolist()):
+        tree.insert(point, i)
+    tree.balance()
+    index = np.zeros(count, dtype=np.int64)
+    distance = np.zeros(count)
+    for i, point in enumerate(mirrored.tolist()):
+        found, index[i], distance[i] = tree.find(point)
+    exact = distance <= tolerance
+    correspondence = None
+    if not exact.all():
+        correspondence = build_surface_correspondence(co, tris, mirrored[~exact])
+    MIRROR_MAP_CACHE.clear()
+    MIRROR_MAP_CACHE[cache_key] = (index, exact, correspondence)
+    return MIRROR_MAP_CACHE[cache_key]
+
+def mirror_weights(mapping, weights):
+    """按镜像映射翻转稠密权重矩阵 (V, N)"""
+    index, exact, correspondence = mapping
+    result = weights[index]
+    if correspondence is not None:
+        result[~exact] = interpolate(correspondence, weights)
+    return result
+
+def flip_weights(obj, pairs, axis):
+    """
+    一次向量化翻转多个顶点组：pairs 为 [(源组名, 目标组名)]，目标组写入源组的镜像权重。
+    所有源组先读出再写入，因此左右互换的组对可以同时处理。
+    """
+    mapping = mirror_map(obj, axis)
+    csr = read_vertex_weights(obj)
+    sources = dense_weights(csr, [obj.vertex_groups[src].index for src, dst in pairs])
+    flipped = mirror_weights(mapping, sources)
+    targets = [obj.vertex_groups[dst].index for src, dst in pairs]
+    write_vertex_weights(obj, dense_to_csr(flipped, targets), replace=targets)
 
 class FlipWeightsOperator(bpy.types.Operator):
     bl_idname = "sk_tools.flip_weights"
@@ -123,69 +585,159 @@ class FlipWeightsOperator(bpy.types.Operator):
     target_group: bpy.props.StringProperty(name="Target Vertex Group")
     axis: bpy.props.EnumProperty(name="Axis", items=[('X', "X", ""), ('Y', "Y", ""), ('Z', "Z", "")], default='X')
     def execute(self, context):
-        original_obj = context.object
-        if not original_obj or original_obj.type != 'MESH' or not original_obj.vertex_groups.active:
+        obj = context.object
+        pairs_mode = context.scene.flip_weights_mode == 'PAIRS'
+        if not obj or obj.type != 'MESH' or not (pairs_mode or obj.vertex_groups.active):
             self.report({'ERROR'}, "Invalid selection or no active vertex group.")
             return {'CANCELLED'}
-        try:
-            mirrored_obj = self.create_mirrored_object(original_obj, context)
-            self.transfer_weights(original_obj, mirrored_obj, context)
-            self.report({'INFO'}, "Weights transferred from Source to Target object.")
-        except Exception as e:
-            self.report({'ERROR'}, str(e))
+        if pairs_mode:
+            pairs = []
+            for vg in obj.vertex_groups:
+                other = mirror_group_name(vg.name)
+                if other and other in obj.vertex_groups:
+                    pairs.append((other, vg.name))
+            if not pairs:
+                self.report({'ERROR'}, "No left/right vertex group pairs found.")
+                return {'CANCELLED'}
+        else:
+            target_group_name = context.scene.flip_weights_target_group
+            if target_group_name not in obj.vertex_groups:
+                self.report({'ERROR'}, f"Target vertex group '{target_group_name}' not found.")
+                return {'CANCELLED'}
+            pairs = [(obj.vertex_groups.active.name, target_group_name)]
+        flip_weights(obj, pairs, context.scene.flip_weights_axis)
+        self.report({'INFO'}, f"Flipped {len(pairs)} vertex group(s).")
+        return {'FINISHED'}
+
+def transfer_vertex_groups(source, target, names, only_selected=False, normalize=False):
+    """
+    用目标顶点到源网格表面的重心对应关系（计算一次并缓存），把 names 中的顶点组一次性插值传递到目标物体。
+    only_selected 时只改写目标的选中顶点，normalize 时对传递的组按顶点归一化。返回传递的组数。
+    """
+    correspondence = object_correspondence(source, target)
+    source_csr = read_vertex_weights(source)
+    values = dense_weights(source_csr, [source.vertex_groups[name].index for name in names])
+    weights = interpolate(correspondence, values).astype(np.float32)
+    if normalize:
+        total = weights.sum(axis=1, keepdims=True)
+        np.divide(weights, total, out=weights, where=total > 0.0)
+    targets = [(target.vertex_groups.get(name) or target.vertex_groups.new(name=name)).index for name in names]
+    if only_selected:
+        mesh = target.data
+        selected = np.zeros(len(mesh.vertices), dtype=bool)
+        mesh.vertices.foreach_get("select", selected)
+        current = dense_weights(read_vertex_weights(target), targets)
+        weights = np.where(selected[:, None], weights, current)
+    write_vertex_weights(target, dense_to_csr(weights, targets), replace=targets)
+    return len(names)
+
+def edge_adjacency(mesh):
+    """
+    网格邻接的 CSR 形式 (indptr, 邻接顶点, 边权)，边权为边长的倒数（归一化前），
+    使较短的边对平滑贡献更大。
+    """
+    count = len(mesh.vertices)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int64)
+    mesh.edges.foreach_get("vertices", edges)
+    edges = edges.reshape(-1, 2)
+    co = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(count, 3).astype(np.float64)
+    length = np.linalg.norm(co[edges[:, 0]] - co[edges[:, 1]], axis=1)
+    weight = 1.0 / np.maximum(length, 1e-8)
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+    weight = np.concatenate((weight, weight))
+    order = np.argsort(rows, kind='stable')
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=count))))
+    return indptr, cols[order], weight[order]
+
+def smooth_weights(weights, adjacency, iterations=1, factor=0.5, mask=None):
+    """
+    对稠密权重矩阵 (V, N) 做加权拉普拉斯平滑：每次迭代 W ← (1-f)W + f·(邻接加权平均)。
+    mask 为 False 的顶点保持不变，没有邻接的顶点保持不变。
+    """
+    indptr, cols, edge_weight = adjacency
+    cumulative = np.concatenate(([0.0], np.cumsum(edge_weight)))
+    degree = cumulative[indptr[1:]] - cumulative[indptr[:-1]]
+    active = np.diff(indptr) > 0
+    if mask is not None:
+        active &= mask
+    result = weights.astype(np.float64)
+    for start in range(0, result.shape[1], SMOOTH_CHUNK):
+        block = result[:, start:start + SMOOTH_CHUNK]
+        for _ in range(iterations):
+            total = np.cumsum(np.vstack((np.zeros((1, block.shape[1])), block[cols] * edge_weight[:, None])), axis=0)
+            neighbour = (total[indptr[1:]] - total[indptr[:-1]])[active] / degree[active, None]
+            block[active] = (1.0 - factor) * block[active] + factor * neighbour
+    return result
+
+class SmoothWeightsOperator(bpy.types.Operator):
+    bl_idname = "sk_tools.smooth_weights"
+    bl_label = "Smooth Weights"
+    bl_options = {'REGISTER', 'UNDO'}
+    def execute(self, context):
+        scene = context.scene
+        obj = context.object
+        if not obj or obj.type != 'MESH' or not obj.vertex_groups:
+            self.report({'ERROR'}, "No mesh object with vertex groups selected.")
             return {'CANCELLED'}
-        finally:
-            if 'mirrored_obj' in locals():
-                bpy.data.objects.remove(mirrored_obj, do_unlink=True)
+        if scene.weight_smooth_groups == 'ACTIVE':
+            indices = [obj.vertex_groups.active_index]
+        else:
+            indices = [vg.index for vg in obj.vertex_groups if not vg.lock_weight]
+        start_time = time.perf_counter()
+        mesh = obj.data
+        mask = None
+        if scene.weight_smooth_only_selected:
+            mask = np.zeros(len(mesh.vertices), dtype=bool)
+            mesh.vertices.foreach_get("select", mask)
+        weights = dense_weights(read_vertex_weights(obj), indices)
+        smoothed = smooth_weights(weights, edge_adjacency(mesh), scene.weight_smooth_iterations, scene.weight_smooth_factor, mask)
+        if scene.weight_smooth_normalize:
+            # 保持每个顶点在这些组上的权重总和不变
+            before = weights.sum(axis=1, keepdims=True)
+            after = smoothed.sum(axis=1, keepdims=True)
+            smoothed *= np.divide(before, after, out=np.ones_like(after), where=after > 0)
+        write_vertex_weights(obj, dense_to_csr(np.minimum(smoothed, 1.0).astype(np.float32), indices, SMOOTH_THRESHOLD), replace=indices)
+        self.report({'INFO'}, f"Smoothed {len(indices)} vertex group(s) in {time.perf_counter() - start_time:.2f}s.")
         return {'FINISHED'}
-    def create_mirrored_object(self, original_obj, context):
-        mirrored_obj_data = original_obj.data.copy()
-        mirrored_obj = bpy.data.objects.new(original_obj.name + "_mirrored", mirrored_obj_data)
-        context.collection.objects.link(mirrored_obj)
-        mirrored_obj.matrix_world = original_obj.matrix_world.copy()
-        axis_scale = {'X': (-1, 1, 1), 'Y': (1, -1, 1), 'Z': (1, 1, -1)}
-        mirrored_obj.scale = axis_scale[self.axis]
-        bpy.context.view_layer.objects.active = mirrored_obj
-        bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-        return mirrored_obj
-    def transfer_weights(self, original_obj, mirrored_obj, context):
-        target_group_name = context.scene.flip_weights_target_group
-        target_group_index = original_obj.vertex_groups.find(target_group_name)
-        if target_group_index == -1:
-            raise ValueError(f"Target vertex group '{target_group_name}' not found.")
-        original_obj.vertex_groups.active_index = target_group_index
-        bpy.context.view_layer.objects.active = original_obj
-        original_obj.select_set(True)
-        mirrored_obj.select_set(True)
-        bpy.ops.object.data_transfer(use_reverse_transfer=True, data_type='VGROUP_WEIGHTS', layers_select_src='ACTIVE', layers_select_dst='ACTIVE', mix_mode='REPLACE', vert_mapping='POLYINTERP_NEAREST')
-        original_obj.select_set(False)
-        mirrored_obj.select_set(False)
-        bpy.ops.object.mode_set(mode='WEIGHT_PAINT')
 
 class WeightSwapOperator(bpy.types.Operator):
     bl_idname = "sk_tools.weight_swap"
     bl_label = "Swap Weights"
     bl_options = {'REGISTER', 'UNDO'}
     def execute(self, context):
-        source_obj = context.scene.weight_swap_obj_a
+        scene = context.scene
+        source_obj = scene.weight_swap_obj_a
         target_obj = context.active_object
-        if not source_obj or not target_obj or not target_obj.vertex_groups.active:
-            self.report({'WARNING'}, "Invalid selection or no active vertex group.")
+        if not source_obj or not target_obj or source_obj.type != 'MESH' or target_obj.type != 'MESH':
+            self.report({'WARNING'}, "Invalid selection.")
+            return {'CANCELLED'}
+        if scene.weight_swap_groups == 'ACTIVE':
+            if not target_obj.vertex_groups.active:
+                self.report({'WARNING'}, "No active vertex group.")
+                return {'CANCELLED'}
+            names = [target_obj.vertex_groups.active.name]
+        elif scene.weight_swap_groups == 'PATTERN':
+            try:
+                pattern = re.compile(scene.weight_swap_pattern)
+            except re.error as e:
+                self.report({'ERROR'}, f"Invalid pattern: {str(e)}")
+                return {'CANCELLED'}
+            names = [vg.name for vg in source_obj.vertex_groups if pattern.search(vg.name)]
+        else:
+            names = [vg.name for vg in source_obj.vertex_groups]
+        missing = [name for name in names if name not in source_obj.vertex_groups]
+        if missing:
+            self.report({'ERROR'}, f"Vertex group '{missing[0]}' not found in Source Object.")
             return {'CANCELLED'}
-        target_vg_name = target_obj.vertex_groups.active.name
-        source_vg = source_obj.vertex_groups.get(target_vg_name)
-        if not source_vg:
-            self.report({'ERROR'}, f"Vertex group '{target_vg_name}' not found in Source Object.")
+        if not names:
+            self.report({'WARNING'}, "No vertex groups to transfer.")
             return {'CANCELLED'}
-        source_obj.vertex_groups.active_index = source_vg.index
-        bpy.context.view_layer.objects.active = target_obj
-        target_obj.select_set(True)
-        source_obj.select_set(True)
-        bpy.ops.object.data_transfer(use_reverse_transfer=True, data_type='VGROUP_WEIGHTS', layers_select_src='ACTIVE', layers_select_dst='ACTIVE', mix_mode='REPLACE', vert_mapping='POLYINTERP_NEAREST')
-        target_obj.select_set(False)
-        source_obj.select_set(False)
-        bpy.ops.object.mode_set(mode='WEIGHT_PAINT')
-        self.report({'INFO'}, "Weights transferred from Source to Target object.")
+        start_time = time.perf_counter()
+        count = transfer_vertex_groups(source_obj, target_obj, names, scene.weight_swap_only_selected, scene.weight_swap_normalize)
+        self.report({'INFO'}, f"Transferred {count} vertex group(s) from Source to Target object in {time.perf_counter() - start_time:.2f}s.")
         return {'FINISHED'}
 
 def draw_panel(layout, context):
@@ -195,41 +747,110 @@ def draw_panel(layout, context):
     match_col = layout.column(align=True)
     match_col.prop(scene, "weight_paint_matching_target")
     match_col.prop(scene, "weight_paint_matching_base")
+    option_row = match_col.row(align=True)
+    option_row.prop(scene, "weight_paint_matching_mode", text="")
+    option_row.prop(scene, "weight_paint_matching_max_distance", text="最大距离")
     
     action_row = match_col.row(align=True)
     action_row.operator("sk_tools.weight_paint_matching", text="匹配顶点组")
+    action_row.operator("sk_tools.weight_paint_matching_preview", text="实时预览")
     action_row.operator("sk_tools.renumber_unknown_vertex_groups", text="移除未知顶点组")
 
+    # Batch section
+    batch_col = layout.column(align=True)
+    batch_col.prop(scene, "weight_paint_matching_collection", text="批量")
+    batch_col.prop(scene, "weight_paint_matching_references", text="参考")
+    batch_col.operator("sk_tools.weight_paint_batch_matching", text="批量匹配")
+
+    # Sort section
+    sort_row = layout.row(align=True)
+    sort_row.operator("sk_tools.sort_vertex_groups", text="数字排序").mode = 'NATURAL'
+    sort_row.operator("sk_tools.sort_vertex_groups", text="按列表排序").mode = 'FILE'
+    sort_row.operator("sk_tools.sort_vertex_groups", text="按骨骼排序").mode = 'BONES'
+
+    # Smooth section
+    smooth_row = layout.row(align=True)
+    smooth_row.prop(scene, "weight_smooth_groups", text="")
+    smooth_row.prop(scene, "weight_smooth_iterations", text="次数")
+    smooth_row.prop(scene, "weight_smooth_factor", text="强度")
+    smooth_option_row = layout.row(align=True)
+    smooth_option_row.prop(scene, "weight_smooth_only_selected", text="仅选中")
+    smooth_option_row.prop(scene, "weight_smooth_normalize", text="保持总和")
+    smooth_option_row.operator("sk_tools.smooth_weights", text="平滑")
+
     # Flip section with button on the right
     flip_row = layout.row(align=True)
-    flip_row.prop(scene, "flip_weights_target_group", text="目标")
+    flip_row.prop(scene, "flip_weights_mode", text="")
+    if scene.flip_weights_mode == 'SINGLE':
+        flip_row.prop(scene, "flip_weights_target_group", text="目标")
+    flip_row.prop(scene, "flip_weights_axis", text="")
     flip_row.operator("sk_tools.flip_weights", text="翻转")
 
     # Swap section with button on the right
     swap_row = layout.row(align=True)
     swap_row.prop(scene, "weight_swap_obj_a", text="参考")
     swap_row.operator("sk_tools.weight_swap", text="交换")
+    swap_option_row = layout.row(align=True)
+    swap_option_row.prop(scene, "weight_swap_groups", text="")
+    if scene.weight_swap_groups == 'PATTERN':
+        swap_option_row.prop(scene, "weight_swap_pattern", text="")
+    swap_option_row.prop(scene, "weight_swap_only_selected", text="仅选中")
+    swap_option_row.prop(scene, "weight_swap_normalize", text="归一化")
 
 def register():
     bpy.utils.register_class(WeightPaintMatchingOperator)
+    bpy.utils.register_class(WeightPaintMatchingPreviewOperator)
+    bpy.utils.register_class(WeightPaintBatchMatchingOperator)
     bpy.utils.register_class(RenameUnknownVertexGroupsOperator)
     bpy.utils.register_class(SortVertexGroupsOperator)
     bpy.utils.register_class(FlipWeightsOperator)
+    bpy.utils.register_class(SmoothWeightsOperator)
     bpy.utils.register_class(WeightSwapOperator)
     bpy.types.Scene.weight_paint_matching_target = PointerProperty(name="基体", description="Object to copy weight paint data from", type=Object)
     bpy.types.Scene.weight_paint_matching_base = PointerProperty(name="目标", description="Object to receive weight paint data", type=Object)
+    bpy.types.Scene.weight_paint_matching_collection = PointerProperty(name="Batch Collection", description="Every mesh in this collection is matched against the reference", type=Collection)
+    bpy.types.Scene.weight_paint_matching_references = PointerProperty(name="Reference Collection", description="Reference meshes for batch matching (defaults to the single reference object)", type=Collection)
+    bpy.types.Scene.weight_paint_matching_mode = EnumProperty(name="Matching Mode", items=[('NEAREST', "最近", "Nearest target centroid per group (KD-tree)"), ('OPTIMAL', "一对一", "Globally optimal one-to-one assignment")], default='NEAREST')
+    bpy.types.Scene.weight_paint_matching_max_distance = FloatProperty(name="Max Distance", description="Groups farther than this stay 'unknown' (0 = no limit)", default=0.0, min=0.0)
     bpy.types.Scene.flip_weights_target_group = StringProperty(name="Target Vertex Group", description="The vertex group that receives the flipped weight paint")
     bpy.types.Scene.flip_weights_axis = EnumProperty(name="Axis", items=[('X', "X", ""), ('Y', "Y", ""), ('Z', "Z", "")], default='X')
+    bpy.types.Scene.flip_weights_mode = EnumProperty(name="Flip Mode", items=[('SINGLE', "单组", "Flip the active group into the target group"), ('PAIRS', "左右对", "Swap and mirror every left/right group pair by name")], default='SINGLE')
+    bpy.types.Scene.weight_smooth_groups = EnumProperty(name="Groups", items=[('ACTIVE', "活动组", "Smooth the active vertex group only"), ('ALL', "全部", "Smooth every unlocked vertex group")], default='ALL')
+    bpy.types.Scene.weight_smooth_iterations = IntProperty(name="Iterations", description="Number of smoothing iterations", default=3, min=1, max=200)
+    bpy.types.Scene.weight_smooth_factor = FloatProperty(name="Factor", description="Blend toward the neighbour average per iteration", default=0.5, min=0.0, max=1.0)
+    bpy.types.Scene.weight_smooth_only_selected = BoolProperty(name="Only Selected", description="Only smooth selected vertices", default=False)
+    bpy.types.Scene.weight_smooth_normalize = BoolProperty(name="Normalize", description="Keep each vertex's total weight over the smoothed groups", default=True)
     bpy.types.Scene.weight_swap_obj_a = PointerProperty(name="Reference", description="Object from which to copy weight paint data", type=Object)
+    bpy.types.Scene.weight_swap_groups = EnumProperty(name="Groups", items=[('ACTIVE', "活动组", "Transfer the active vertex group only"), ('ALL', "全部", "Transfer every vertex group of the reference"), ('PATTERN', "名称匹配", "Transfer reference groups whose name matches a regular expression")], default='ACTIVE')
+    bpy.types.Scene.weight_swap_pattern = StringProperty(name="Pattern", description="Regular expression selecting the groups to transfer", default="")
+    bpy.types.Scene.weight_swap_only_selected = BoolProperty(name="Only Selected", description="Only overwrite weights of selected target vertices", default=False)
+    bpy.types.Scene.weight_swap_normalize = BoolProperty(name="Normalize", description="Normalize the transferred groups per vertex", default=False)
 
 def unregister():
     bpy.utils.unregister_class(WeightSwapOperator)
+    bpy.utils.unregister_class(SmoothWeightsOperator)
     bpy.utils.unregister_class(FlipWeightsOperator)
     bpy.utils.unregister_class(SortVertexGroupsOperator)
     bpy.utils.unregister_class(RenameUnknownVertexGroupsOperator)
+    bpy.utils.unregister_class(WeightPaintBatchMatchingOperator)
+    bpy.utils.unregister_class(WeightPaintMatchingPreviewOperator)
     bpy.utils.unregister_class(WeightPaintMatchingOperator)
     del bpy.types.Scene.weight_paint_matching_target
     del bpy.types.Scene.weight_paint_matching_base
+    del bpy.types.Scene.weight_paint_matching_mode
+    del bpy.types.Scene.weight_paint_matching_collection
+    del bpy.types.Scene.weight_paint_matching_references
+    del bpy.types.Scene.weight_paint_matching_max_distance
     del bpy.types.Scene.flip_weights_target_group
     del bpy.types.Scene.flip_weights_axis
-    del bpy.types.Scene.weight_swap_obj_a
\ No newline at end of file
+    del bpy.types.Scene.flip_weights_mode
+    del bpy.types.Scene.weight_smooth_groups
+    del bpy.types.Scene.weight_smooth_iterations
+    del bpy.types.Scene.weight_smooth_factor
+    del bpy.types.Scene.weight_smooth_only_selected
+    del bpy.types.Scene.weight_smooth_normalize
+    del bpy.types.Scene.weight_swap_obj_a
+    del bpy.types.Scene.weight_swap_groups
+    del bpy.types.Scene.weight_swap_pattern
+    del bpy.types.Scene.weight_swap_only_selected
+    del bpy.types.Scene.weight_swap_normalize
\ No newline at end of file